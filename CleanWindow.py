@@ -152,8 +152,22 @@ class Ui_MainWindow(object):
         self.verticalLayout_2.setStretch(0, 15)
         self.verticalLayout_2.setStretch(1, 1)
         self.horizontalLayout_3.addLayout(self.verticalLayout_2)
+        self.thumbnail_listWidget = QtWidgets.QListWidget(self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.thumbnail_listWidget.sizePolicy().hasHeightForWidth())
+        self.thumbnail_listWidget.setSizePolicy(sizePolicy)
+        self.thumbnail_listWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.thumbnail_listWidget.setIconSize(QtCore.QSize(96, 96))
+        self.thumbnail_listWidget.setMovement(QtWidgets.QListView.Static)
+        self.thumbnail_listWidget.setResizeMode(QtWidgets.QListView.Adjust)
+        self.thumbnail_listWidget.setViewMode(QtWidgets.QListView.IconMode)
+        self.thumbnail_listWidget.setObjectName("thumbnail_listWidget")
+        self.horizontalLayout_3.addWidget(self.thumbnail_listWidget)
         self.horizontalLayout_3.setStretch(0, 1)
         self.horizontalLayout_3.setStretch(1, 15)
+        self.horizontalLayout_3.setStretch(2, 8)
         self.verticalLayout_4.addLayout(self.horizontalLayout_3)
         self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_2.setObjectName("horizontalLayout_2")
@@ -225,13 +239,31 @@ class Ui_MainWindow(object):
         self.menubar.setObjectName("menubar")
         self.menu = QtWidgets.QMenu(self.menubar)
         self.menu.setObjectName("menu")
+        self.sort_menu = QtWidgets.QMenu(self.menu)
+        self.sort_menu.setObjectName("sort_menu")
         MainWindow.setMenuBar(self.menubar)
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
         self.statusbar.setObjectName("statusbar")
         MainWindow.setStatusBar(self.statusbar)
         self.software_update_action = QtWidgets.QAction(MainWindow)
         self.software_update_action.setObjectName("software_update_action")
+        self.batch_mode_action = QtWidgets.QAction(MainWindow)
+        self.batch_mode_action.setCheckable(True)
+        self.batch_mode_action.setObjectName("batch_mode_action")
+        self.dedup_action = QtWidgets.QAction(MainWindow)
+        self.dedup_action.setCheckable(True)
+        self.dedup_action.setObjectName("dedup_action")
+        self.validate_action = QtWidgets.QAction(MainWindow)
+        self.validate_action.setCheckable(True)
+        self.validate_action.setObjectName("validate_action")
+        self.shard_action = QtWidgets.QAction(MainWindow)
+        self.shard_action.setObjectName("shard_action")
         self.menu.addAction(self.software_update_action)
+        self.menu.addAction(self.batch_mode_action)
+        self.menu.addAction(self.dedup_action)
+        self.menu.addAction(self.validate_action)
+        self.menu.addAction(self.sort_menu.menuAction())
+        self.menu.addAction(self.shard_action)
         self.menubar.addAction(self.menu.menuAction())
 
         self.retranslateUi(MainWindow)
@@ -250,4 +282,9 @@ class Ui_MainWindow(object):
         self.next_pushButton.setText(_translate("MainWindow", "下一张(D)"))
         self.label_2.setText(_translate("MainWindow", " 剩余数量："))
         self.menu.setTitle(_translate("MainWindow", "设置"))
+        self.sort_menu.setTitle(_translate("MainWindow", "排序方式"))
         self.software_update_action.setText(_translate("MainWindow", "软件更新"))
+        self.batch_mode_action.setText(_translate("MainWindow", "批量分类模式"))
+        self.dedup_action.setText(_translate("MainWindow", "打开文件夹后查找重复图片"))
+        self.validate_action.setText(_translate("MainWindow", "打开文件夹后检查损坏图片"))
+        self.shard_action.setText(_translate("MainWindow", "分片清洗..."))
@@ -4,25 +4,55 @@ Project Name: data_clean
 File Created: 2024.07.22
 Author: ZhangYuetao
 File Name: DialogMain.py
-last update： 2024.08.27
+last update： 2026.10.18
 """
 
+from functools import lru_cache
+
 from PyQt5.QtWidgets import QDialog
 from PyQt5 import QtGui, QtCore
 
 from classify_key_dialog import Ui_Dialog
-from utils import read_json, write_json
+
+MODIFIER_KEY_NAMES = {
+    QtCore.Qt.Key_Control: 'Ctrl',
+    QtCore.Qt.Key_Shift: 'Shift',
+    QtCore.Qt.Key_Alt: 'Alt',
+    QtCore.Qt.Key_Meta: 'Windows',  # 默认Windows操作系统
+}
+MODIFIER_NAMES = (
+    (QtCore.Qt.ControlModifier, 'Ctrl'),
+    (QtCore.Qt.ShiftModifier, 'Shift'),
+    (QtCore.Qt.AltModifier, 'Alt'),
+    (QtCore.Qt.MetaModifier, 'Windows'),
+)
+
+
+@lru_cache(maxsize=1024)
+def get_key_name(key, modifiers=0):
+    """
+    将按键与修饰键转换为快捷键名，如 'q'、'Shift'、'Ctrl+q'，
+    录入快捷键与主窗口分发按键共用，保证两边一致
+    """
+    if key in MODIFIER_KEY_NAMES:
+        return MODIFIER_KEY_NAMES[key]
+    key_text = QtGui.QKeySequence(key).toString(QtGui.QKeySequence.NativeText)
+    if 'A' <= key_text <= 'Z':
+        key_text = key_text.lower()
+    names = [name for modifier, name in MODIFIER_NAMES if modifiers & modifier]
+    names.append(key_text)
+    return '+'.join(names)
 
 
 class InputDialog(QDialog, Ui_Dialog):
-    def __init__(self, parent=None):
+    def __init__(self, class_registry, parent=None):
         super(InputDialog, self).__init__(parent)
         self.setupUi(self)
         self.setWindowTitle("新建分类类别")
         self.setWindowIcon(QtGui.QIcon("xey.ico"))
 
         self.name = None
-        self.classify_button_json_path = r'settings/classify_button.json'  # json文件路径
+        self.class_registry = class_registry  # 与主窗口共用的分类注册表
 
         self.buttonBox.accepted.connect(self.return_accept)
         self.buttonBox.rejected.connect(self.reject)
@@ -34,23 +64,11 @@ class InputDialog(QDialog, Ui_Dialog):
         # 安装事件过滤器
         self.short_key_lineEdit.installEventFilter(self)
 
-        self.parent = parent  # 保存父窗口引用
-
     # 处理键盘按键事件
     def eventFilter(self, obj, event):
         if event.type() == QtCore.QEvent.KeyPress:
-            key = event.key()
-            key_text = QtGui.QKeySequence(key).toString(QtGui.QKeySequence.NativeText)
-            if key == QtCore.Qt.Key_Shift:
-                key_text = 'Shift'
-            elif key == QtCore.Qt.Key_Control:
-                key_text = 'Ctrl'
-            elif key == QtCore.Qt.Key_Alt:
-                key_text = 'Alt'
-            elif key == QtCore.Qt.Key_Meta:
-                key_text = 'Windows'  # 默认Windows操作系统
-            elif 'A' <= key_text <= 'Z':
-                key_text = key_text.lower()
+            # 记录修饰键组合，如 Ctrl+q
+            key_text = get_key_name(event.key(), int(event.modifiers()))
             if obj == self.short_key_lineEdit:
                 self.short_key_lineEdit.setText(key_text)
             return True
@@ -64,37 +82,22 @@ class InputDialog(QDialog, Ui_Dialog):
         self.submit()
         self.delete_input_line()
 
-    @staticmethod
-    def check_key_name(key_name, classes_data):
-        for key in classes_data.keys():
-            if classes_data[key]["input_keys"] == key_name:
-                return False
-        return True
-
     def submit(self):
         if not self.short_key_lineEdit.text():
             self.info_label.setText('未设置快捷键')
             return
+        if self.short_key_lineEdit.text() in MODIFIER_KEY_NAMES.values():
+            self.info_label.setText('快捷键不能只是修饰键，请按普通键或组合键')
+            return
         if not self.filename_lineEdit.text():
             self.info_label.setText('未设置分类名')
             return
 
         try:
-            classes_data = read_json(self.classify_button_json_path, {})
-            if self.check_key_name(self.short_key_lineEdit.text(), classes_data):
-                i = 1
-                while f"类别_{i}" in classes_data:
-                    i += 1
-                self.name = f"类别_{i}"
-                classes_data[self.name] = {
-                    "input_keys": self.short_key_lineEdit.text(),
-                    "input_filename": self.filename_lineEdit.text()
-                }
-                write_json(self.classify_button_json_path, classes_data)
+            name = self.class_registry.add(self.short_key_lineEdit.text(), self.filename_lineEdit.text())
+            if name is not None:
+                self.name = name
                 self.info_label.setText(f'{self.name} 保存成功')
-
-                if self.parent:
-                    self.parent.load_classes()  # 调用父窗口的load_keys方法
             else:
                 self.info_label.setText('快捷键已存在')
         except Exception as e:
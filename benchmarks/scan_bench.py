@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: scan_bench.py
+last update： 2026.10.18
+
+图片类型判断基准测试：
+    1. 对合成的文件名（默认 100 万个，扩展名大小写混杂）比较旧的 endswith 匹配与 ImageTypeDetector 的扩展名查表；
+    2. 在临时文件夹中生成真实文件，用程序实际使用的 ScanIndex 扫描，比较关闭/开启文件头校验（sniff）时
+       首次完整扫描（索引为空）的单文件耗时，以及再次打开（目录未变化，直接取用索引）的单文件耗时。
+用法: python benchmarks/scan_bench.py [--entries 1000000] [--files 20000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from image_types import ImageTypeDetector  # noqa: E402
+from scan_index import ScanIndex  # noqa: E402
+
+OLD_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.img')  # 改动前区分大小写的扩展名
+NAME_EXTENSIONS = ('.jpg', '.JPG', '.jpeg', '.png', '.PNG', '.Png', '.tif', '.TIFF', '.webp', '.HEIC', '.bmp',
+                   '.txt', '.json', '.xml', '', '.db')
+HEADERS = {
+    '.jpg': b'\xff\xd8\xff\xe0' + bytes(60),
+    '.png': b'\x89PNG\r\n\x1a\n' + bytes(56),
+    '.tif': b'II*\x00' + bytes(60),
+    '.txt': b'plain text, not an image' + bytes(40),
+}
+
+
+def make_names(count, seed=0):
+    rnd = random.Random(seed)
+    return [f'IMG_{i:07d}_{rnd.randrange(1 << 20):05x}{rnd.choice(NAME_EXTENSIONS)}' for i in range(count)]
+
+
+def bench_names(names, detector):
+    start_time = time.perf_counter()
+    old_count = sum(1 for name in names if name.endswith(OLD_EXTENSIONS))
+    old_elapsed = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    new_count = sum(1 for name in names if detector.extension_of(name))
+    new_elapsed = time.perf_counter() - start_time
+
+    print(f'{len(names)} 个文件名:')
+    print(f'  endswith（区分大小写）: 命中 {old_count}，{old_elapsed:.3f} 秒，'
+          f'{old_elapsed / len(names) * 1e9:.0f} ns/个')
+    print(f'  扩展名查表（不区分大小写）: 命中 {new_count}，{new_elapsed:.3f} 秒，'
+          f'{new_elapsed / len(names) * 1e9:.0f} ns/个')
+
+
+def bench_scan(file_count, formats):
+    """生成真实文件（含改错扩展名的文本文件），比较 sniff 关闭/开启时的扫描耗时"""
+    temp_dir = tempfile.mkdtemp(prefix='scan_bench_')
+    data_dir = os.path.join(temp_dir, 'data')
+    try:
+        extensions = list(HEADERS)
+        for i in range(file_count):
+            sub_dir = os.path.join(data_dir, f'd{i % 20:02d}')
+            os.makedirs(sub_dir, exist_ok=True)
+            content_extension = extensions[i % len(extensions)]
+            # 每 10 个文本文件中有 1 个被改成 .jpg 扩展名
+            name_extension = '.JPG' if content_extension == '.txt' and i % 10 == 3 else content_extension
+            with open(os.path.join(sub_dir, f'f{i:06d}{name_extension}'), 'wb') as file:
+                file.write(HEADERS[content_extension])
+
+        for sniff in (False, True):
+            scan_index = ScanIndex(os.path.join(temp_dir, f'scan_index_{sniff}.db'),
+                                   ImageTypeDetector(formats, sniff=sniff))
+            for title in ('首次扫描', '再次打开'):
+                start_time = time.perf_counter()
+                count = sum(1 for _ in scan_index.iter_image_entries(data_dir))
+                elapsed = time.perf_counter() - start_time
+                print(f'  sniff={sniff} {title}: 识别 {count} 张，{elapsed:.3f} 秒，'
+                      f'{elapsed / file_count * 1e6:.1f} us/文件')
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图片类型判断基准测试')
+    parser.add_argument('--entries', type=int, default=1000000, help='合成文件名数量')
+    parser.add_argument('--files', type=int, default=20000, help='扫描测试生成的真实文件数量，为 0 时跳过')
+    args = parser.parse_args()
+
+    detector = ImageTypeDetector()
+    print(f'已启用格式: {", ".join(detector.formats)}')
+    bench_names(make_names(args.entries), detector)
+    if args.files:
+        print(f'扫描 {args.files} 个真实文件:')
+        bench_scan(args.files, detector.formats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: sort_bench.py
+last update： 2026.10.18
+
+排序与分片基准测试：对合成的 (路径, 文件大小, mtime) 条目（默认 100 万条，分布在多个文件夹中）
+统计各排序方式的耗时，以及 K 路分片的耗时、各片大小与是否互不重叠、完整覆盖。
+用法: python benchmarks/sort_bench.py [--entries 1000000] [--shards 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from image_order import SORT_MODES, order_entries  # noqa: E402
+
+ROOT = os.path.join(os.sep, 'data', 'dataset')
+FILES_PER_DIR = 1000
+
+
+def make_entries(count, seed=0):
+    """按文件夹依次产出的合成条目（与 ScanIndex.iter_image_entries 的顺序一致），文件夹内为乱序"""
+    rnd = random.Random(seed)
+    entries = []
+    for start in range(0, count, FILES_PER_DIR):
+        dir_path = os.path.join(ROOT, f'batch{start // FILES_PER_DIR}', 'cam')
+        numbers = list(range(start, min(count, start + FILES_PER_DIR)))
+        rnd.shuffle(numbers)
+        entries.extend((os.path.join(dir_path, f'IMG_{i}.JPG'), rnd.randrange(1 << 22), rnd.randrange(1 << 40))
+                       for i in numbers)
+    return entries
+
+
+def timed(func):
+    start_time = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='排序与分片基准测试')
+    parser.add_argument('--entries', type=int, default=1000000, help='合成条目数量')
+    parser.add_argument('--shards', type=int, default=4, help='分片数 K')
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+    print(f'{len(entries)} 条目:')
+    for sort_mode, title in SORT_MODES.items():
+        paths, elapsed = timed(lambda: list(order_entries(iter(entries), sort_mode)))
+        print(f'  {title}: {elapsed:.3f} 秒，{elapsed / len(entries) * 1e9:.0f} ns/条')
+
+    shards = []
+    total_elapsed = 0.0
+    for shard_index in range(args.shards):
+        paths, elapsed = timed(lambda: list(order_entries(iter(entries), root=ROOT,
+                                                          shard=(shard_index, args.shards))))
+        shards.append(paths)
+        total_elapsed += elapsed
+    union = set().union(*shards)
+    print(f'  {args.shards} 路分片（含按文件夹排序）: 共 {total_elapsed:.3f} 秒，'
+          f'各片大小 {[len(paths) for paths in shards]}，'
+          f'互不重叠: {sum(map(len, shards)) == len(union)}，完整覆盖: {len(union) == len(entries)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: startup_bench.py
+last update： 2026.10.18
+
+启动耗时基准测试：在无界面（offscreen）平台下多次启动主窗口，统计各模块导入耗时、各启动阶段耗时与到 show() 的时间。
+用法: python benchmarks/startup_bench.py [--runs 5] [--cold] [--max-show-ms 300]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHOW_PHASE = '显示窗口'  # startup_trace 中 myWin.show() 完成的阶段名
+FIRST_PAINT_TIMEOUT = 10  # 等待首次绘制的最长时间（秒）
+
+
+def run_child():
+    """子进程：按正式启动流程创建并显示主窗口，首次绘制后输出各阶段时间点"""
+    sys.path.insert(0, REPO_DIR)
+    import main
+    from startup_trace import startup_trace
+
+    app, _ = main.launch(sys.argv[:1])
+    deadline = time.monotonic() + FIRST_PAINT_TIMEOUT
+    while not startup_trace.finished and time.monotonic() < deadline:
+        app.processEvents()
+    marks = [(phase, (mark_time - startup_trace.start_time) * 1000) for phase, mark_time in startup_trace.marks]
+    print(json.dumps(marks, ensure_ascii=False), flush=True)
+    os._exit(0)  # 不等待后台线程，避免退出流程计入下一次测量
+
+
+def parse_import_times(stderr_text):
+    """解析 -X importtime 输出，返回 main 直接导入的各模块累计耗时（毫秒）与 main 的总耗时"""
+    entries = []  # [(深度, 模块名, 累计耗时毫秒)]
+    for line in stderr_text.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(cumulative) / 1000))
+
+    modules = {}
+    total_ms = 0.0
+    for i, (depth, name, cumulative_ms) in enumerate(entries):
+        if name != 'main':
+            continue
+        total_ms = cumulative_ms
+        # 子模块先于父模块输出：向前收集深度为 depth + 1 的记录，直到遇到同级或更浅的记录
+        for child_depth, child_name, child_ms in reversed(entries[:i]):
+            if child_depth <= depth:
+                break
+            if child_depth == depth + 1:
+                modules[child_name] = child_ms
+        break
+    return modules, total_ms
+
+
+def run_once(work_dir):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    start_time = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child'],
+                            cwd=work_dir, env=env, capture_output=True, text=True, encoding='utf-8')
+    wall_ms = (time.perf_counter() - start_time) * 1000
+    marks = None
+    for line in result.stdout.splitlines():
+        if line.startswith('['):
+            marks = dict(json.loads(line))
+    if marks is None:
+        raise RuntimeError(f'启动失败:\n{result.stderr[-2000:]}')
+    modules, import_ms = parse_import_times(result.stderr)
+    return marks, modules, import_ms, wall_ms
+
+
+def prepare_work_dir():
+    """在临时目录中准备运行环境（复制分类配置，不读取已有的会话日志与缓存）"""
+    work_dir = tempfile.mkdtemp(prefix='startup_bench_')
+    os.makedirs(os.path.join(work_dir, 'settings'))
+    classes_path = os.path.join(REPO_DIR, 'settings', 'classify_button.json')
+    if os.path.exists(classes_path):
+        shutil.copy2(classes_path, os.path.join(work_dir, 'settings'))
+    return work_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据清洗软件启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=5, help='启动次数，结果取中位数')
+    parser.add_argument('--cold', action='store_true', help='每次启动前清空样式表缓存')
+    parser.add_argument('--top', type=int, default=15, help='显示导入耗时最多的模块数量')
+    parser.add_argument('--max-show-ms', type=float, default=None, help='到 show() 的中位耗时超过该值时返回非零退出码')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+        return
+
+    work_dir = prepare_work_dir()
+    runs = []
+    try:
+        for _ in range(args.runs):
+            if args.cold:
+                shutil.rmtree(os.path.join(work_dir, 'settings'))
+                os.makedirs(os.path.join(work_dir, 'settings'))
+            runs.append(run_once(work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f'启动次数: {len(runs)}（{"冷启动" if args.cold else "首次为冷启动，其余使用缓存"}），以下均为中位数\n')
+    print('各模块导入耗时（main 直接导入的模块，含其依赖）:')
+    module_names = {name for _, modules, _, _ in runs for name in modules}
+    module_ms = {name: statistics.median(modules.get(name, 0.0) for _, modules, _, _ in runs) for name in module_names}
+    for name, ms in sorted(module_ms.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {name:<24}{ms:8.1f} ms')
+    print(f'  {"main（合计）":<22}{statistics.median(import_ms for _, _, import_ms, _ in runs):8.1f} ms\n')
+
+    print('启动阶段（自 startup_trace 导入起累计）:')
+    for phase in runs[0][0]:
+        print(f'  {phase:<20}{statistics.median(marks.get(phase, 0.0) for marks, _, _, _ in runs):8.1f} ms')
+    show_ms = statistics.median(marks.get(SHOW_PHASE, 0.0) for marks, _, _, _ in runs)
+    print(f'\n到 show() 耗时: {show_ms:.1f} ms')
+    print(f'进程总耗时（含解释器启动与退出）: {statistics.median(wall_ms for _, _, _, wall_ms in runs):.1f} ms')
+
+    if args.max_show_ms is not None and show_ms > args.max_show_ms:
+        print(f'到 show() 耗时超过上限 {args.max_show_ms} ms', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
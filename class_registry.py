@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: class_registry.py
+last update： 2026.10.18
+"""
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from utils import read_json, write_json, build_key_index, check_key_name, normalize_key_name
+
+
+class ClassRegistry(QObject):
+    """
+    分类类别的内存注册表，由主窗口与新建分类对话框共用；
+    修改后通过信号通知界面，并合并短时间内的多次修改后再原子写入 json 文件
+    """
+    class_added = pyqtSignal(str)  # 新增的分类名
+    class_renamed = pyqtSignal(str, str)  # 原分类名, 新分类名
+    class_removed = pyqtSignal(str)  # 删除的分类名
+    save_failed = pyqtSignal(str)  # 写入失败的错误信息
+
+    SAVE_DELAY_MS = 500  # 修改后延迟写入的时间（毫秒）
+
+    def __init__(self, json_path, parent=None):
+        super(ClassRegistry, self).__init__(parent)
+        self.json_path = json_path
+        self.classes = read_json(json_path, {})  # 分类名 -> {"input_keys", "input_filename"}
+
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(ClassRegistry.SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.flush)
+
+        if self._normalize_keys():
+            self._schedule_save()
+        self.key_index = build_key_index(self.classes)  # 快捷键 -> 分类名
+
+    def _normalize_keys(self):
+        """转换旧版保存的单字符快捷键，转换后与已有快捷键冲突的保持原样；有转换时返回 True"""
+        used_keys = {class_info["input_keys"] for class_info in self.classes.values() if "input_keys" in class_info}
+        changed = False
+        for class_info in self.classes.values():
+            input_keys = class_info.get("input_keys")
+            if input_keys is None:
+                continue
+            new_keys = normalize_key_name(input_keys)
+            if new_keys != input_keys and new_keys not in used_keys:
+                class_info["input_keys"] = new_keys
+                used_keys.discard(input_keys)
+                used_keys.add(new_keys)
+                changed = True
+        return changed
+
+    def get_by_key(self, key_name):
+        """按快捷键查找分类信息，无匹配时返回 None"""
+        class_name = self.key_index.get(key_name)
+        if class_name is None:
+            return None
+        return self.classes[class_name]
+
+    def add(self, input_keys, input_filename):
+        """新增分类，自动命名为 类别_i；快捷键已被占用时返回 None"""
+        if not check_key_name(input_keys, self.key_index):
+            return None
+        i = 1
+        while f"类别_{i}" in self.classes:
+            i += 1
+        class_name = f"类别_{i}"
+        self.classes[class_name] = {
+            "input_keys": input_keys,
+            "input_filename": input_filename
+        }
+        self.key_index[input_keys] = class_name
+        self._schedule_save()
+        self.class_added.emit(class_name)
+        return class_name
+
+    def rename(self, class_name, new_name):
+        """重命名分类并保持原有顺序；新名称已存在时返回 False"""
+        if class_name not in self.classes or (new_name in self.classes and new_name != class_name):
+            return False
+        if new_name == class_name:
+            return True
+        self.classes = {new_name if name == class_name else name: class_info
+                        for name, class_info in self.classes.items()}
+        input_keys = self.classes[new_name].get("input_keys")
+        if input_keys is not None:
+            self.key_index[input_keys] = new_name
+        self._schedule_save()
+        self.class_renamed.emit(class_name, new_name)
+        return True
+
+    def remove(self, class_name):
+        class_info = self.classes.pop(class_name, None)
+        if class_info is None:
+            return
+        self.key_index.pop(class_info.get("input_keys"), None)
+        self._schedule_save()
+        self.class_removed.emit(class_name)
+
+    def flush(self):
+        """立即写入尚未保存的修改"""
+        self._save_timer.stop()
+        try:
+            write_json(self.json_path, self.classes)
+        except OSError as e:
+            self.save_failed.emit(str(e))
+
+    def _schedule_save(self):
+        # 重新计时，连续修改只在最后一次修改后写入一次
+        self._save_timer.start()
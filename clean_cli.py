@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: clean_cli.py
+last update： 2026.10.18
+
+数据清洗命令行工具（无界面），与主窗口共用 clean_engine：
+    python clean_cli.py scan <图片文件夹> [--sort name] [--shard 1/4]  列出文件夹下的全部图片（可作为标注文件模板）
+    python clean_cli.py apply <标注文件> <保存路径> [--dry-run]     按标注文件将图片分类到保存路径下的类别文件夹
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from clean_engine import CleanEngine, apply_plan, plan_labels, read_labels
+from image_order import DEFAULT_SORT_MODE, SORT_MODES, parse_shard
+from image_types import IMAGE_FORMATS_PATH, ImageTypeDetector
+from scan_index import ScanIndex
+from utils import read_json
+
+# 默认配置位于程序所在目录（而非当前工作目录）下的 settings，可在任意目录中作为流水线工具调用
+PROGRAM_DIR = os.path.dirname(os.path.abspath(sys.argv[0] if getattr(sys, 'frozen', False) else __file__))
+SETTINGS_DIR = os.path.join(PROGRAM_DIR, 'settings')
+CLASSES_PATH = os.path.join(SETTINGS_DIR, 'classify_button.json')  # 分类信息，类别名 -> {"input_keys", "input_filename"}
+SCAN_INDEX_PATH = os.path.join(SETTINGS_DIR, 'scan_index.db')  # 扫描索引，与主窗口共用
+
+
+def scan(args):
+    if not os.path.isdir(args.dir_path):
+        print(f'图片文件夹 {args.dir_path} 不存在', file=sys.stderr)
+        return 2
+    os.makedirs(SETTINGS_DIR, exist_ok=True)
+    detector = ImageTypeDetector.from_settings(os.path.join(SETTINGS_DIR, os.path.basename(IMAGE_FORMATS_PATH)))
+    if args.sniff:
+        detector = ImageTypeDetector(detector.formats, sniff=True)
+    engine = CleanEngine(scan_index=ScanIndex(SCAN_INDEX_PATH, detector))
+    count = 0
+    for image_path in engine.iter_image_files(args.dir_path, args.sort, args.shard):
+        print(image_path)
+        count += 1
+    print(f'共 {count} 张图片', file=sys.stderr)
+
+
+def apply(args):
+    classes = read_json(args.classes, None)
+    if not classes:
+        print(f'分类信息 {args.classes} 不存在或为空', file=sys.stderr)
+        return 2
+    plan = plan_labels(read_labels(args.labels, args.root), classes, args.save_path)
+    print(plan.report())
+    if args.report:
+        report = {
+            'class_counts': dict(plan.class_counts),
+            'total_bytes': plan.total_bytes,
+            'issues': [issue._asdict() for issue in plan.issues],
+        }
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=4)
+    if args.dry_run or not plan.move_count:
+        return 0
+
+    def progress(finished, total):
+        print(f'\r已处理 {finished}/{total}', end='', file=sys.stderr, flush=True)
+
+    moved, errors, elapsed = apply_plan(plan, args.workers, progress=progress)
+    print(file=sys.stderr)
+    print(f'已移动 {moved} 张，失败 {len(errors)} 张，耗时 {elapsed:.2f} 秒，'
+          f'{moved / elapsed if elapsed else 0:.0f} 张/秒，'
+          f'{plan.total_bytes / 1024 / 1024 / elapsed if elapsed else 0:.1f} MB/秒')
+    for image_path, error in errors[:20]:
+        print(f'  {image_path}: {error}', file=sys.stderr)
+    return 1 if errors else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='数据清洗命令行工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = subparsers.add_parser('scan', help='列出文件夹下的全部图片')
+    scan_parser.add_argument('dir_path', help='图片文件夹')
+    scan_parser.add_argument('--sniff', action='store_true', help='校验文件头，排除扩展名为图片但内容不是图片的文件')
+    scan_parser.add_argument('--sort', choices=list(SORT_MODES), default=DEFAULT_SORT_MODE, help='排序方式')
+    scan_parser.add_argument('--shard', type=parse_shard, default=None,
+                             help='只列出分片 i/K（如 1/4），各分片按相对路径哈希划分、互不重叠')
+    scan_parser.set_defaults(func=scan)
+
+    apply_parser = subparsers.add_parser('apply', help='按标注文件（CSV 或 JSONL）分类图片')
+    apply_parser.add_argument('labels', help='标注文件：CSV 每行为 路径,类别名；JSONL 每行为 {"path": ..., "class": ...}')
+    apply_parser.add_argument('save_path', help='保存路径，图片移动到其下对应类别的文件夹')
+    apply_parser.add_argument('--classes', default=CLASSES_PATH, help='分类信息 json 文件')
+    apply_parser.add_argument('--root', default=None, help='标注中相对路径的根目录，默认为标注文件所在文件夹')
+    apply_parser.add_argument('--workers', type=int, default=8, help='并行移动的线程数')
+    apply_parser.add_argument('--dry-run', action='store_true', help='只输出执行计划，不移动文件')
+    apply_parser.add_argument('--report', default=None, help='将执行计划（含无法执行的条目）写入 json 文件')
+    apply_parser.set_defaults(func=apply)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args) or 0
+    except (OSError, sqlite3.Error) as e:
+        print(f'错误: {e}', file=sys.stderr)
+        return 2
+    except (ValueError, KeyError) as e:
+        print(f'标注文件格式错误: {e}', file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: clean_engine.py
+last update： 2026.10.18
+"""
+
+import csv
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter, namedtuple
+
+from file_mover import FileMover, MoveTask
+from image_order import DEFAULT_SORT_MODE, RESTAT_SORT_MODES, order_entries
+from image_sequence import ImageSequence
+from scan_index import ScanIndex
+
+LabelIssue = namedtuple('LabelIssue', ['path', 'class_name', 'reason'])
+
+
+class CleanEngine:
+    """
+    与界面无关的清洗核心：待清洗队列、分类移动、撤回与失败回滚，
+    主窗口与命令行批量工具共用；移动在后台线程池中执行，结束后调用 on_move_finished(task)
+    """
+
+    def __init__(self, max_workers=4, on_move_finished=None, scan_index=None):
+        self.image_files = ImageSequence()  # 待清洗图片队列
+        self.undo_stack = []  # 撤回栈，元素为 [MoveTask, 队列槽位列表]，一次（批量）分类为一个元素
+        self.mover = FileMover(max_workers, on_finished=on_move_finished)  # 后台文件移动队列
+        self.scan_index = scan_index  # 可选的 ScanIndex，加速重复扫描同一文件夹
+        # 恢复会话时等待放回原位置的已分类图片：原队列中的下一张图片 -> [(源路径, 撤回记录, 序号)]
+        self._placements = {}
+
+    def reset(self):
+        """清空队列与撤回记录（打开新文件夹时），撤回记录的槽位只对应当前队列"""
+        self.image_files = ImageSequence()
+        self.undo_stack = []
+        self._placements = {}
+
+    def iter_image_files(self, dir_path, sort_mode=DEFAULT_SORT_MODE, shard=None):
+        """按排序方式产出文件夹下的图片路径，shard 为 (分片序号, 分片数) 时只产出该分片"""
+        if self.scan_index is None:
+            self.scan_index = ScanIndex()
+        entries = self.scan_index.iter_image_entries(dir_path, restat=sort_mode in RESTAT_SORT_MODES)
+        return order_entries(entries, sort_mode, os.path.abspath(dir_path), shard)
+
+    def is_conflict(self, dst_path):
+        """目标路径已存在或已有排队中的移动"""
+        return os.path.exists(dst_path) or self.mover.is_pending(dst_path)
+
+    def classify(self, slots, target_dir):
+        """
+        将队列中的若干槽位作为一次操作移动到 target_dir，同名冲突的跳过；
+        返回 (MoveTask 或 None, 跳过的槽位列表)
+        """
+        moves = []
+        moved_slots = []
+        skipped_slots = []
+        planned_paths = set()
+        for slot in slots:
+            image_path = self.image_files.path_at_slot(slot)
+            dst_path = os.path.join(target_dir, os.path.basename(image_path))
+            if dst_path in planned_paths or self.is_conflict(dst_path):
+                skipped_slots.append(slot)
+                continue
+            planned_paths.add(dst_path)
+            moves.append((image_path, dst_path))
+            moved_slots.append(slot)
+        if not moves:
+            return None, skipped_slots
+
+        task = self.mover.submit(moves)
+        for slot in moved_slots:
+            self.image_files.remove_slot(slot)
+        self.undo_stack.append([task, moved_slots])
+        return task, skipped_slots
+
+    def move_records(self, task):
+        """
+        返回写入会话日志的 [(源路径, 目标路径, 原队列中的下一张图片)]，
+        下一张图片按全部槽位（含已移除的）的顺序取，恢复会话时据此将图片放回原位置
+        """
+        for entry in reversed(self.undo_stack):
+            if entry[0] is task:
+                return [(src_path, dst_path, self.image_files.path_at_slot(slot + 1)
+                         if slot is not None and slot + 1 < self.image_files.slot_count() else None)
+                        for (src_path, dst_path), slot in zip(task.moves, entry[1])]
+        return [(src_path, dst_path, None) for src_path, dst_path in task.moves]
+
+    def restore_history(self, undo_stack):
+        """
+        由会话日志恢复撤回记录：只保留确实已完成的移动（崩溃时可能仍在排队）；
+        其源路径在扫描到原队列中的下一张图片时作为已移除的槽位放回（见 extend），
+        撤回后回到原来的位置。返回过滤后的撤回记录
+        """
+        done_stack = []
+        for moves in undo_stack:
+            done_moves = [tuple(move) for move in moves if os.path.exists(move[1]) and not os.path.exists(move[0])]
+            if not done_moves:
+                continue
+            entry = [MoveTask.completed([move[:2] for move in done_moves]), [None] * len(done_moves)]
+            for i, move in enumerate(done_moves):
+                # 旧版日志没有记录下一张图片，扫描结束后追加到末尾
+                next_path = move[2] if len(move) > 2 else None
+                self._placements.setdefault(next_path, []).append((move[0], entry, i))
+            self.undo_stack.append(entry)
+            done_stack.append(done_moves)
+        return done_stack
+
+    def extend(self, image_paths):
+        """追加扫描到的图片，恢复会话时先放回排在它前面的已分类图片"""
+        for image_path in image_paths:
+            if self._placements:
+                self._place_before(image_path)
+            self.image_files.append(image_path)
+
+    def finish_restore(self):
+        """扫描结束后，将仍未放回的已分类图片（其下一张图片已不存在）追加到末尾"""
+        for next_path in list(self._placements):
+            self._place_before(next_path)
+
+    def _place_before(self, image_path):
+        # 显式栈代替递归：连续分类的图片会形成很长的"下一张"链
+        stack = [(False, waiting) for waiting in reversed(self._placements.pop(image_path, ()))]
+        while stack:
+            ready, waiting = stack.pop()
+            src_path, entry, i = waiting
+            if ready:
+                if entry[1][i] is None:
+                    entry[1][i] = self.image_files.append_removed(src_path)
+                continue
+            stack.append((True, waiting))
+            stack.extend((False, before) for before in reversed(self._placements.pop(src_path, ())))
+
+    def restore_failed(self, task):
+        """
+        将移动失败的图片放回队列，并从撤回记录中去掉这些图片（全部失败时去掉整条记录），
+        撤回时不会再对它们做无效的操作；返回恢复的槽位列表
+        """
+        if not task.errors:
+            return []
+        for i, entry in enumerate(self.undo_stack):
+            if entry[0] is task:
+                failed_paths = {src_path for src_path, _ in task.errors}
+                kept = [(move, slot) for move, slot in zip(task.moves, entry[1]) if move[0] not in failed_paths]
+                restored = [slot for move, slot in zip(task.moves, entry[1]) if move[0] in failed_paths]
+                for slot in restored:
+                    self.image_files.restore(slot)
+                if kept:
+                    task.moves = [move for move, _ in kept]
+                    entry[1] = [slot for _, slot in kept]
+                else:
+                    del self.undo_stack[i]
+                return restored
+        return []
+
+    def undo(self):
+        """撤回最近一次分类，返回恢复的槽位列表；没有可撤回的操作时返回 None"""
+        if not self.undo_stack:
+            return None
+        task, slots = self.undo_stack.pop()
+        # 恢复会话后扫描尚未到达原位置的图片，只能追加到末尾
+        for i, slot in enumerate(slots):
+            if slot is None:
+                slots[i] = self.image_files.append_removed(task.moves[i][0])
+        # 尚未执行的移动直接取消；已执行的等待完成后移回
+        if not self.mover.cancel(task):
+            for src_path, dst_path in reversed(task.moved):
+                shutil.move(dst_path, src_path)
+        # 恢复队列中的原槽位，无需重新扫描文件夹
+        for slot in slots:
+            self.image_files.restore(slot)
+        return slots
+
+    def close(self):
+        """等待全部排队中的移动结束（退出前调用）"""
+        self.mover.flush()
+
+
+def read_labels(labels_path, root_dir=None):
+    """
+    读取标注文件，逐条产出 (图片路径, 类别名)：
+    .jsonl 每行为 {"path": ..., "class": ...}；其余按 CSV 读取前两列（首行为 path,class 表头时跳过）。
+    相对路径相对于 root_dir（默认为标注文件所在文件夹）
+    """
+    if root_dir is None:
+        root_dir = os.path.dirname(os.path.abspath(labels_path))
+    with open(labels_path, 'r', encoding='utf-8-sig', newline='') as file:
+        if labels_path.lower().endswith('.jsonl'):
+            rows = ((record['path'], record['class']) for record in (json.loads(line) for line in file if line.strip()))
+        else:
+            rows = (row[:2] for row in csv.reader(file) if len(row) >= 2)
+        for i, (image_path, class_name) in enumerate(rows):
+            if i == 0 and (image_path.strip().lower(), class_name.strip().lower()) == ('path', 'class'):
+                continue
+            yield os.path.join(root_dir, image_path.strip()), class_name.strip()
+
+
+class LabelPlan:
+    """标注文件的执行计划：按目标文件夹分组的图片与无法执行的条目"""
+
+    def __init__(self):
+        self.groups = {}  # 目标文件夹 -> [图片路径]
+        self.issues = []  # [LabelIssue]
+        self.class_counts = Counter()  # 类别名 -> 计划移动的数量
+        self.total_bytes = 0  # 计划移动的总字节数
+
+    @property
+    def move_count(self):
+        return sum(self.class_counts.values())
+
+    def report(self):
+        """返回预演报告的文本"""
+        lines = [f'计划移动 {self.move_count} 张图片（{self.total_bytes / 1024 / 1024:.1f} MB）']
+        for class_name, count in sorted(self.class_counts.items()):
+            lines.append(f'  {class_name}: {count}')
+        if self.issues:
+            reasons = Counter(issue.reason for issue in self.issues)
+            lines.append(f'无法执行 {len(self.issues)} 条: '
+                         + '，'.join(f'{reason} {count}' for reason, count in reasons.items()))
+        return '\n'.join(lines)
+
+
+def plan_labels(labels, classes, save_path):
+    """
+    根据标注与分类信息（classify_button.json 的内容）生成执行计划，
+    未知类别、源文件不存在、目标同名冲突的条目记入 issues，不会被移动
+    """
+    plan = LabelPlan()
+    planned_paths = set()
+    for image_path, class_name in labels:
+        class_info = classes.get(class_name)
+        if class_info is None:
+            plan.issues.append(LabelIssue(image_path, class_name, '未知类别'))
+            continue
+        try:
+            size = os.stat(image_path).st_size
+        except OSError:
+            plan.issues.append(LabelIssue(image_path, class_name, '源文件不存在'))
+            continue
+        target_dir = os.path.join(save_path, class_info['input_filename'])
+        dst_path = os.path.join(target_dir, os.path.basename(image_path))
+        if dst_path in planned_paths or os.path.exists(dst_path):
+            plan.issues.append(LabelIssue(image_path, class_name, '目标存在同名文件'))
+            continue
+        planned_paths.add(dst_path)
+        plan.groups.setdefault(target_dir, []).append(image_path)
+        plan.class_counts[class_name] += 1
+        plan.total_bytes += size
+    return plan
+
+
+def apply_plan(plan, max_workers=4, chunk_size=256, progress=None):
+    """
+    用 CleanEngine 执行计划：每个目标文件夹按 chunk_size 张分为一次操作，由 max_workers 个线程并行移动；
+    返回 (已移动数量, 失败列表 [(路径, 异常)], 耗时秒数)。progress(已结束数量, 总数) 在工作线程中调用
+    """
+    finished = [0]
+    lock = threading.Lock()
+
+    def move_finished(task):
+        with lock:
+            finished[0] += len(task.moves)
+            if progress is not None:
+                progress(finished[0], plan.move_count)
+
+    engine = CleanEngine(max_workers, on_move_finished=move_finished)
+    tasks = []
+    skipped = []
+    start_time = time.perf_counter()
+    for target_dir, image_paths in plan.groups.items():
+        for i in range(0, len(image_paths), chunk_size):
+            slots = [engine.image_files.append(image_path) for image_path in image_paths[i:i + chunk_size]]
+            task, skipped_slots = engine.classify(slots, target_dir)
+            if task is not None:
+                tasks.append(task)
+            skipped.extend(engine.image_files.path_at_slot(slot) for slot in skipped_slots)
+    engine.close()
+    elapsed = time.perf_counter() - start_time
+
+    moved = sum(len(task.moved) for task in tasks)
+    errors = [error for task in tasks for error in task.errors]
+    errors.extend((image_path, FileExistsError('目标存在同名文件')) for image_path in skipped)
+    return moved, errors, elapsed
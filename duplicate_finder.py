@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: duplicate_finder.py
+last update： 2026.10.18
+"""
+
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 计算文件哈希时每次读取的字节数
+DHASH_SIZE = 8  # 差异哈希边长，得到 DHASH_SIZE * DHASH_SIZE 位
+
+
+def file_sha1(image_path):
+    sha1 = hashlib.sha1()
+    with open(image_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def image_dhash(image_path):
+    """
+    差异哈希（dHash）：解码时直接缩小为 (DHASH_SIZE + 1) x DHASH_SIZE 的灰度图，
+    比较每行相邻像素的明暗得到 64 位整数；无法解码时返回 None
+    """
+    from PyQt5.QtCore import QSize
+    from PyQt5.QtGui import QImage, QImageReader
+    try:
+        import numpy as np
+    except ImportError:  # 未安装 numpy 时退回为纯 Python 计算
+        np = None
+
+    reader = QImageReader(image_path)
+    reader.setScaledSize(QSize(DHASH_SIZE + 1, DHASH_SIZE))
+    image = reader.read()
+    if image.isNull():
+        return None
+    image = image.convertToFormat(QImage.Format_Grayscale8)
+    data = image.constBits().asstring(image.sizeInBytes())
+    line = image.bytesPerLine()
+    if np is not None:
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(DHASH_SIZE, line)[:, :DHASH_SIZE + 1]
+        bits = np.packbits(pixels[:, 1:] > pixels[:, :-1])
+        return int.from_bytes(bits.tobytes(), 'big')
+    value = 0
+    for row in range(DHASH_SIZE):
+        pixels = data[row * line:row * line + DHASH_SIZE + 1]
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[col + 1] > pixels[col])
+    return value
+
+
+def _hash_worker(job):
+    """进程池任务：job 为 (路径, 是否计算 sha1, 是否计算 dHash)，返回 (路径, sha1, dHash)"""
+    image_path, need_sha1, need_dhash = job
+    sha1 = dhash = None
+    try:
+        if need_sha1:
+            sha1 = file_sha1(image_path)
+        if need_dhash:
+            dhash = image_dhash(image_path)
+    except OSError:
+        pass
+    return image_path, sha1, dhash
+
+
+class HashCache:
+    """文件哈希缓存（SQLite），以 (大小, mtime) 校验，文件未变化时直接复用上次的结果"""
+
+    def __init__(self, db_path=r'settings/hash_cache.db'):
+        self.db_path = db_path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS hashes ('
+                     'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT, dhash TEXT)')
+        return conn
+
+    def load(self, stats):
+        """stats 为 {路径: (大小, mtime)}，返回 {路径: [sha1, dHash]}（仅包含未变化的记录）"""
+        cached = {}
+        conn = self._connect()
+        try:
+            for path, size, mtime_ns, sha1, dhash in conn.execute(
+                    'SELECT path, size, mtime_ns, sha1, dhash FROM hashes'):
+                if stats.get(path) == (size, mtime_ns):
+                    cached[path] = [sha1, int(dhash, 16) if dhash else None]
+        finally:
+            conn.close()
+        return cached
+
+    def save(self, records):
+        """records 为 [(路径, 大小, mtime, sha1, dHash)]"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)',
+                                 [(path, size, mtime_ns, sha1, None if dhash is None else f'{dhash:016x}')
+                                  for path, size, mtime_ns, sha1, dhash in records])
+        finally:
+            conn.close()
+
+
+def _near_pairs(dhashes, threshold):
+    """
+    找出汉明距离不超过 threshold 的 dHash 对（下标）：将 64 位分为 threshold + 1 段，
+    距离不超过 threshold 的两个哈希至少有一段完全相同（抽屉原理），只需比较同段相同的候选
+    """
+    segments = threshold + 1
+    bits = DHASH_SIZE * DHASH_SIZE
+    bounds = [(bits * i // segments, bits * (i + 1) // segments) for i in range(segments)]
+    checked = set()
+    for start, end in bounds:
+        mask = (1 << (end - start)) - 1
+        buckets = defaultdict(list)
+        for i, dhash in dhashes:
+            buckets[(dhash >> start) & mask].append((i, dhash))
+        for members in buckets.values():
+            for a in range(len(members)):
+                i, hash_i = members[a]
+                for j, hash_j in members[a + 1:]:
+                    if (i, j) not in checked and bin(hash_i ^ hash_j).count('1') <= threshold:
+                        checked.add((i, j))
+                        yield i, j
+
+
+def find_duplicates(image_paths, hash_cache=None, max_workers=None, threshold=4, near=True, progress=None,
+                    is_cancelled=None):
+    """
+    查找重复图片，返回重复簇列表（每簇为按 image_paths 顺序排列的路径列表，首张为代表图片）：
+    完全相同：先按文件大小分桶，只对大小相同的文件计算 sha1；
+    近似重复（near 为 True 时）：与所在簇代表图片的 dHash 汉明距离不超过 threshold
+    （不做传递合并，缓慢变化的连续帧不会串成一簇）。
+    哈希在进程池中计算，结果按 (大小, mtime) 缓存；progress(已完成, 总数)；is_cancelled() 为 True 时返回 None
+    """
+    stats = {}
+    for image_path in image_paths:
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            continue
+        stats[image_path] = (stat.st_size, stat.st_mtime_ns)
+
+    size_counts = defaultdict(int)
+    for size, _ in stats.values():
+        size_counts[size] += 1
+
+    cached = hash_cache.load(stats) if hash_cache is not None else {}
+    hashes = {}  # 路径 -> [sha1, dHash]
+    jobs = []
+    for image_path, (size, _) in stats.items():
+        sha1, dhash = cached.get(image_path, [None, None])
+        need_sha1 = size_counts[size] > 1 and sha1 is None
+        need_dhash = near and dhash is None
+        hashes[image_path] = [sha1, dhash]
+        if need_sha1 or need_dhash:
+            jobs.append((image_path, need_sha1, need_dhash))
+
+    if jobs:
+        records = []
+        # 由带多个后台线程的 Qt 进程 fork 子进程可能死锁，统一使用 spawn（与 Windows 打包版一致）
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            for done, (image_path, sha1, dhash) in enumerate(
+                    executor.map(_hash_worker, jobs, chunksize=max(1, min(64, len(jobs) // 64))), 1):
+                entry = hashes[image_path]
+                entry[0] = sha1 or entry[0]
+                entry[1] = dhash if dhash is not None else entry[1]
+                records.append((image_path, *stats[image_path], entry[0], entry[1]))
+                if progress is not None:
+                    progress(done, len(jobs))
+                if is_cancelled is not None and is_cancelled():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return None
+        if hash_cache is not None:
+            hash_cache.save(records)
+
+    order = {image_path: i for i, image_path in enumerate(image_paths)}
+    indexes = sorted(order[image_path] for image_path in hashes)
+    # 完全相同的文件归到其中最靠前的一张
+    rep = {}  # 下标 -> 代表图片的下标
+    first_by_sha1 = {}
+    for i in indexes:
+        sha1 = hashes[image_paths[i]][0]
+        rep[i] = i if sha1 is None else first_by_sha1.setdefault(sha1, i)
+    if near:
+        # 按顺序处理：与已有代表图片距离不超过 threshold 时归入距离最近的一簇，否则自身成为代表图片
+        dhashes = {i: hashes[image_paths[i]][1] for i in indexes
+                   if rep[i] == i and hashes[image_paths[i]][1] is not None}
+        neighbors = defaultdict(list)
+        for i, j in _near_pairs(dhashes.items(), threshold):
+            neighbors[max(i, j)].append(min(i, j))
+        for i in sorted(neighbors):
+            candidates = [k for k in neighbors[i] if rep[k] == k]
+            if candidates:
+                rep[i] = min(candidates, key=lambda k: (bin(dhashes[i] ^ dhashes[k]).count('1'), k))
+        for i in indexes:
+            rep[i] = rep[rep[i]]
+
+    clusters = defaultdict(list)
+    for i in indexes:
+        clusters[rep[i]].append(image_paths[i])
+    return [paths for paths in clusters.values() if len(paths) > 1]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: file_mover.py
+last update： 2026.10.18
+"""
+
+import os
+import shutil
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MoveTask:
+    """一次排队中的移动操作，可包含一个或多个文件（批量分类）"""
+
+    def __init__(self, moves):
+        self.moves = moves  # [(源路径, 目标路径)]
+        self.moved = []  # 已成功移动的 (源路径, 目标路径)
+        self.errors = []  # 移动失败的 (源路径, 异常)
+        self.future = None
+
+    @classmethod
+    def completed(cls, moves):
+        """构造一个已完成的移动（如从会话日志恢复的记录），可直接用于撤回"""
+        task = cls(moves)
+        task.moved = list(moves)
+        task.future = Future()
+        task.future.set_result(None)
+        return task
+
+
+class FileMover:
+    """
+    后台文件移动队列，在 I/O 线程池中执行移动，调用方无需等待跨卷复制；
+    每次移动结束（可能部分失败）后在工作线程中调用 on_finished(task)
+    """
+
+    def __init__(self, max_workers=4, on_finished=None):
+        self.on_finished = on_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='FileMove')
+        self._pending = {}  # 目标路径 -> 尚未结束的 MoveTask
+        self._lock = threading.Lock()
+        self.failed_count = 0  # 累计失败数量
+
+    def submit(self, moves):
+        """将一组 (源路径, 目标路径) 作为一次操作加入队列，立即返回 MoveTask"""
+        task = MoveTask(moves)
+        with self._lock:
+            for _, dst_path in moves:
+                self._pending[dst_path] = task
+        task.future = self._executor.submit(self._move, task)
+        return task
+
+    def is_pending(self, dst_path):
+        """目标路径是否已有尚未完成的移动"""
+        with self._lock:
+            return dst_path in self._pending
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def cancel(self, task):
+        """
+        撤销一次移动：尚未开始的直接取消并返回 True；
+        已开始或已结束的等待其结束后返回 False，由调用方将 task.moved 中的文件移回
+        """
+        if task.future.cancel():
+            self._finish(task)
+            return True
+        task.future.result()
+        return False
+
+    def flush(self):
+        """等待全部排队中的移动结束（退出前调用）"""
+        self._executor.shutdown(wait=True)
+
+    def _move(self, task):
+        # 按目标文件夹分组，每个文件夹只创建一次，同卷时直接 rename
+        groups = defaultdict(list)
+        for src_path, dst_path in task.moves:
+            groups[os.path.dirname(dst_path)].append((src_path, dst_path))
+        for dst_dir, moves in groups.items():
+            try:
+                os.makedirs(dst_dir, exist_ok=True)
+            except OSError as e:
+                task.errors.extend((src_path, e) for src_path, _ in moves)
+                continue
+            for src_path, dst_path in moves:
+                try:
+                    try:
+                        os.rename(src_path, dst_path)
+                    except OSError:
+                        shutil.move(src_path, dst_path)  # 跨卷时退回为复制后删除
+                    task.moved.append((src_path, dst_path))
+                except Exception as e:
+                    task.errors.append((src_path, e))
+        self._finish(task)
+        if self.on_finished is not None:
+            self.on_finished(task)
+
+    def _finish(self, task):
+        with self._lock:
+            for _, dst_path in task.moves:
+                if self._pending.get(dst_path) is task:
+                    del self._pending[dst_path]
+            self.failed_count += len(task.errors)
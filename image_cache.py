@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: image_cache.py
+last update： 2026.10.18
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class ImageCache:
+    """按字节数限制容量的 LRU 缓存（线程安全），键为 (路径, mtime, 文件大小, 目标宽, 目标高)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes  # 缓存容量上限（字节）
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+        self.evictions = 0  # 淘汰次数
+
+        self._entries = OrderedDict()  # 键 -> (值, 字节数)，按最近使用排序
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(image_path):
+        """返回文件的 (路径, mtime, 文件大小)，文件不存在时返回 None"""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return image_path, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def make_key(file_key, width, height):
+        """由文件键与目标尺寸组成缓存键，目标尺寸为 None 表示原图"""
+        if file_key is None:
+            return None
+        return file_key + (width, height)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        if key is None or nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._bytes -= old_entry[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats_text(self):
+        """返回命中/未命中/淘汰统计与占用内存，用于状态栏显示"""
+        return (f'命中 {self.hits} / 未命中 {self.misses} / 淘汰 {self.evictions}, '
+                f'{self._bytes / (1024 * 1024):.0f}/{self.max_bytes / (1024 * 1024):.0f} MB')
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: image_loader.py
+last update： 2026.10.18
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImageReader
+
+from image_cache import ImageCache
+
+# 解码结果：image 为（可能已预缩放的）图像，width/height 为原图尺寸
+DecodedImage = namedtuple('DecodedImage', ['image', 'width', 'height'])
+
+
+class ImageLoader:
+    """图像解码器，统一负责从磁盘读取并解码图片，同时统计解码次数与耗时（线程安全）"""
+
+    def __init__(self, cache=None):
+        self.cache = cache  # 可选的 ImageCache，缓存解码结果
+        self.decode_count = 0  # 累计解码次数
+        self.decode_seconds = 0.0  # 累计解码耗时（秒）
+        self._lock = threading.Lock()
+
+    def decode(self, image_path, fit_size=None):
+        """
+        读取并解码一张图片，解码失败时 image.isNull() 为 True
+        :param image_path: 图片路径
+        :param fit_size: QSize，若给出且原图更大，则直接以缩小后的分辨率解码（JPEG 使用 DCT 缩放），
+                         不再先解码原图再缩放
+        :return: DecodedImage
+        """
+        key = None
+        if self.cache is not None:
+            fit_width, fit_height = (fit_size.width(), fit_size.height()) if fit_size is not None else (None, None)
+            key = ImageCache.make_key(ImageCache.file_key(image_path), fit_width, fit_height)
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                return cached
+
+        start_time = time.perf_counter()
+        reader = QImageReader(image_path)
+        original_size = reader.size()  # 只读取文件头获取原图尺寸
+        if fit_size is not None and original_size.isValid() and self._exceeds(original_size, fit_size):
+            reader.setScaledSize(original_size.scaled(fit_size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if original_size.isValid():
+            width, height = original_size.width(), original_size.height()
+        else:
+            # 部分格式无法从文件头获取尺寸，退回为解码后再缩放
+            width, height = image.width(), image.height()
+            if fit_size is not None and not image.isNull() and self._exceeds(image.size(), fit_size):
+                image = image.scaled(fit_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        elapsed = time.perf_counter() - start_time
+        with self._lock:
+            self.decode_seconds += elapsed
+            self.decode_count += 1
+
+        decoded = DecodedImage(image, width, height)
+        if key is not None and not image.isNull():
+            self.cache.put(key, decoded, image.sizeInBytes())
+        return decoded
+
+    @staticmethod
+    def _exceeds(size, fit_size):
+        return size.width() > fit_size.width() or size.height() > fit_size.height()
+
+    def stats_text(self):
+        """返回解码统计信息，用于状态栏显示"""
+        if self.decode_count == 0:
+            return '解码: 0 次'
+        average_ms = self.decode_seconds * 1000 / self.decode_count
+        return f'解码: {self.decode_count} 次, 平均 {average_ms:.1f} ms'
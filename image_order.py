@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: image_order.py
+last update： 2026.10.18
+"""
+
+import os
+import re
+import zlib
+from itertools import groupby
+
+_DIGITS = re.compile(r'(\d+)')
+
+# 排序方式 -> 显示名称；directory 可边扫描边输出，其余需扫描完成后整体排序
+SORT_MODES = {
+    'directory': '按文件夹分组',
+    'name': '按文件名（自然排序）',
+    'mtime': '按修改时间',
+    'size': '按文件大小',
+}
+DEFAULT_SORT_MODE = 'directory'
+# 按文件大小或 mtime 排序时，扫描需重新 stat 取自扫描索引的文件（原地修改的文件不会改变所在目录的 mtime）
+RESTAT_SORT_MODES = frozenset({'mtime', 'size'})
+
+
+def natural_key(text):
+    """自然排序键：数字部分按数值比较（img2 排在 img10 之前），字母部分不区分大小写"""
+    # re.split 的结果总是 字符串, 数字, 字符串, ... 交替，相同位置的类型一致，可直接比较
+    parts = _DIGITS.split(text.lower())
+    parts[1::2] = map(int, parts[1::2])
+    return parts
+
+
+def parse_shard(text):
+    """解析分片 "i/K"（i 从 1 开始），返回 (分片序号（0 开始）, 分片数)"""
+    index, _, count = text.partition('/')
+    index, count = int(index), int(count)
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f'无效的分片: {text}')
+    return index - 1, count
+
+
+def shard_of(image_path, root, shard_count, _prefix=None):
+    """
+    图片所属分片：对相对 root 的路径（统一为 / 分隔）取 crc32 后求余，
+    与挂载位置、扫描顺序和其他文件无关，不同机器打开同一数据集得到相同且互不重叠的划分
+    """
+    prefix = _prefix if _prefix is not None else os.path.join(root, '')
+    if image_path.startswith(prefix):
+        rel_path = image_path[len(prefix):]  # 比 os.path.relpath 快一个数量级
+    else:
+        rel_path = os.path.relpath(image_path, root)
+    if os.sep != '/':
+        rel_path = rel_path.replace(os.sep, '/')
+    return zlib.crc32(rel_path.encode('utf-8')) % shard_count
+
+
+def order_entries(entries, sort_mode=DEFAULT_SORT_MODE, root=None, shard=None):
+    """
+    按排序方式与分片产出图片路径，entries 为按文件夹依次产出的 (路径, 文件大小, mtime)；
+    shard 为 (分片序号, 分片数) 时只保留该分片（先分片再排序，排序只作用于保留的条目）。
+    排序键在排序前一次性算好（sorted 的 key 对每个条目只计算一次）
+    """
+    if sort_mode not in SORT_MODES:
+        raise ValueError(f'未知的排序方式: {sort_mode}')
+    if shard is not None:
+        shard_index, shard_count = shard
+        prefix = os.path.join(root, '')
+        entries = (entry for entry in entries if shard_of(entry[0], root, shard_count, prefix) == shard_index)
+
+    if sort_mode == 'directory':
+        # 文件夹已按遍历顺序产出，只需对每个文件夹内的文件排序，无需等待扫描结束
+        for _, group in groupby(entries, key=lambda entry: os.path.dirname(entry[0])):
+            yield from sorted((entry[0] for entry in group), key=lambda path: natural_key(os.path.basename(path)))
+        return
+
+    if sort_mode == 'name':
+        keyed = [(natural_key(os.path.basename(path)), path) for path, _, _ in entries]
+    elif sort_mode == 'mtime':
+        keyed = [(mtime_ns, path) for path, _, mtime_ns in entries]
+    else:
+        keyed = [(size, path) for path, size, _ in entries]
+    # 键相同时按路径排序，保证结果确定
+    keyed.sort()
+    for _, path in keyed:
+        yield path
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: image_sequence.py
+last update： 2026.10.18
+"""
+
+
+class ImageSequence:
+    """
+    待清洗图片队列：删除只做标记不移动元素，用树状数组（Fenwick 树）统计各位置之前的剩余数量，
+    删除、恢复、按剩余序号查找均为 O(log n)，剩余数量查询为 O(1)
+    """
+
+    def __init__(self, image_files=()):
+        self._paths = []  # 全部路径（槽位），删除后仍保留
+        self._alive = bytearray()  # 各槽位是否仍在队列中
+        self._tree = [0]  # 树状数组，下标从 1 开始
+        self._count = 0  # 剩余数量
+        self.extend(image_files)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (path for path, alive in zip(self._paths, self._alive) if alive)
+
+    def __getitem__(self, index):
+        """按剩余序号（0 开始）获取图片路径"""
+        return self._paths[self._find(index)]
+
+    def append(self, image_path):
+        """追加一张图片，返回其槽位"""
+        self._paths.append(image_path)
+        self._alive.append(1)
+        i = len(self._paths)
+        # tree[i] 统计区间 (i - lowbit(i), i]
+        self._tree.append(1 + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self._count += 1
+        return i - 1
+
+    def append_removed(self, image_path):
+        """追加一个已移除的槽位（如从会话日志恢复的已分类图片），返回其槽位，供 restore 恢复"""
+        slot = self.append(image_path)
+        self.remove_slot(slot)
+        return slot
+
+    def extend(self, image_files):
+        for image_path in image_files:
+            self.append(image_path)
+
+    def alive_slots(self):
+        """按顺序产出仍在队列中的槽位"""
+        return (slot for slot, alive in enumerate(self._alive) if alive)
+
+    def slot_at(self, index):
+        """第 index 个剩余图片所在的槽位"""
+        return self._find(index)
+
+    def path_at_slot(self, slot):
+        return self._paths[slot]
+
+    def slot_count(self):
+        """槽位总数（含已移除的）"""
+        return len(self._paths)
+
+    def remove_at(self, index):
+        """移除第 index 个剩余图片，返回其槽位，供 restore 恢复"""
+        slot = self._find(index)
+        self.remove_slot(slot)
+        return slot
+
+    def remove_slot(self, slot):
+        if self._alive[slot]:
+            self._alive[slot] = 0
+            self._add(slot + 1, -1)
+            self._count -= 1
+
+    def index_of_slot(self, slot):
+        """槽位当前的剩余序号（即其之前剩余图片的数量）"""
+        return self._prefix(slot)
+
+    def restore(self, slot):
+        """恢复已移除的槽位，返回其当前的剩余序号"""
+        if not self._alive[slot]:
+            self._alive[slot] = 1
+            self._add(slot + 1, 1)
+            self._count += 1
+        return self._prefix(slot)
+
+    def _prefix(self, i):
+        """前 i 个槽位中剩余的数量"""
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _add(self, i, delta):
+        size = len(self._tree)
+        while i < size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _find(self, index):
+        """找到第 index 个（0 开始）剩余图片所在的槽位"""
+        if not 0 <= index < self._count:
+            raise IndexError('图片索引超出范围')
+        pos = 0
+        remaining = index + 1
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_pos = pos + step
+            if next_pos < len(self._tree) and self._tree[next_pos] < remaining:
+                pos = next_pos
+                remaining -= self._tree[next_pos]
+            step >>= 1
+        return pos
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: image_types.py
+last update： 2026.10.18
+"""
+
+import os
+
+from utils import read_json
+
+IMAGE_FORMATS_PATH = r'settings/image_formats.json'  # 图片格式配置：{"formats": [格式名], "sniff": 是否校验文件头}
+SNIFF_BYTES = 16  # 校验文件头时读取的字节数
+
+# 格式名 -> (扩展名, 文件头签名, 需要 Qt 具备的解码插件)；
+# 每个签名为若干 (偏移, 字节) 且需全部匹配，签名为空的格式不做文件头校验
+IMAGE_FORMATS = {
+    'jpeg': (('.jpg', '.jpeg', '.jpe', '.jfif'), (((0, b'\xff\xd8\xff'),),), None),
+    'png': (('.png',), (((0, b'\x89PNG\r\n\x1a\n'),),), None),
+    'gif': (('.gif',), (((0, b'GIF87a'),), ((0, b'GIF89a'),)), None),
+    'bmp': (('.bmp', '.dib'), (((0, b'BM'),),), None),
+    # 含 16 位 TIFF，由 Qt 的 tiff 插件解码
+    'tiff': (('.tif', '.tiff'), (((0, b'II*\x00'),), ((0, b'MM\x00*'),), ((0, b'II+\x00'),), ((0, b'MM\x00+'),)),
+             None),
+    'img': (('.img',), (), None),
+    'webp': (('.webp',), (((0, b'RIFF'), (8, b'WEBP')),), b'webp'),
+    'heic': (('.heic', '.heif'), tuple(((4, b'ftyp'), (8, brand)) for brand in
+                                      (b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1')),
+             b'heic'),
+}
+DEFAULT_FORMATS = ('jpeg', 'png', 'gif', 'bmp', 'tiff', 'img', 'webp', 'heic')
+
+
+def supported_decoders():
+    """Qt 当前可用的图片解码插件名集合；未安装 PyQt5 时返回 None（不做限制）"""
+    try:
+        from PyQt5.QtGui import QImageReader
+    except ImportError:
+        return None
+    return {bytes(image_format).lower() for image_format in QImageReader.supportedImageFormats()}
+
+
+class ImageTypeDetector:
+    """
+    图片类型判断：先按扩展名（不区分大小写）查表筛选；开启 sniff 时再读取文件开头 SNIFF_BYTES 字节，
+    只保留文件头属于任一已启用格式的文件（扩展名与内容不符但内容为图片的文件照常保留，由 Qt 按内容解码）。
+    需要解码插件的格式（如 WebP、HEIC）只在 Qt 具备对应插件时启用
+    """
+
+    def __init__(self, formats=DEFAULT_FORMATS, sniff=False):
+        decoders = supported_decoders()
+        self.formats = tuple(name for name in formats if name in IMAGE_FORMATS and (
+                IMAGE_FORMATS[name][2] is None or decoders is None or IMAGE_FORMATS[name][2] in decoders))
+        self.sniff = sniff
+        self.extensions = frozenset(extension for name in self.formats for extension in IMAGE_FORMATS[name][0])
+        self.signatures = tuple(signature for name in self.formats for signature in IMAGE_FORMATS[name][1])
+        # 不做文件头校验的扩展名（格式没有固定签名）
+        self.unchecked_extensions = frozenset(extension for name in self.formats if not IMAGE_FORMATS[name][1]
+                                              for extension in IMAGE_FORMATS[name][0])
+
+    @classmethod
+    def from_settings(cls, config_path=IMAGE_FORMATS_PATH):
+        config = read_json(config_path, {})
+        return cls(config.get('formats', DEFAULT_FORMATS), config.get('sniff', False))
+
+    @property
+    def key(self):
+        """检测规则的标识，规则变化时扫描索引需要重建"""
+        return ','.join(sorted(self.formats)) + (';sniff' if self.sniff else '')
+
+    def extension_of(self, name):
+        """返回小写的扩展名（含点），扩展名不是已启用的图片格式时返回 None"""
+        dot = name.rfind('.')
+        if dot < 0:
+            return None
+        extension = name[dot:].lower()
+        return extension if extension in self.extensions else None
+
+    def matches_header(self, header):
+        return any(all(header[offset:offset + len(magic)] == magic for offset, magic in signature)
+                   for signature in self.signatures)
+
+    def is_image(self, path, name=None):
+        """
+        判断文件是否为图片，name 为文件名（已知时传入可省去一次路径拆分）；
+        只有扩展名命中且开启 sniff 时才会读取文件
+        """
+        extension = self.extension_of(name if name is not None else path)
+        if extension is None:
+            return False
+        if not self.sniff or extension in self.unchecked_extensions:
+            return True
+        try:
+            with open(path, 'rb') as file:
+                return self.matches_header(file.read(SNIFF_BYTES))
+        except OSError:
+            return False
+
+    def scan_dir(self, dir_path):
+        """
+        列举一个文件夹（不含子文件夹）：返回 ([(图片文件名, 文件大小, mtime)], [子文件夹名])，
+        均为 os.scandir 的顺序；无法列举的文件夹返回两个空列表
+        """
+        files = []
+        sub_dirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_dirs.append(entry.name)
+                        elif self.extension_of(entry.name) and entry.is_file() \
+                                and self.is_image(entry.path, entry.name):
+                            stat = entry.stat()
+                            files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, sub_dirs
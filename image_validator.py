@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: image_validator.py
+last update： 2026.10.18
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from image_types import IMAGE_FORMATS
+
+CHECK_DECODE_SIZE = 64  # 解码检查时缩小到的最长边，只验证数据能否完整解码
+TRAILER_BYTES = 4096  # 检查文件结尾标记时读取的末尾字节数
+TRAILERS = {
+    b'jpeg': b'\xff\xd9',  # JPEG 结束标记 EOI
+    b'png': b'IEND',  # PNG 结束块
+}
+
+
+def _qt_format_of(image_path, supported_formats):
+    """按扩展名得到 Qt 解码插件名，Qt 无法解码该格式（如 .img、未安装插件的 HEIC）时返回 None"""
+    extension = os.path.splitext(image_path)[1].lower()
+    for name, (extensions, _, _) in IMAGE_FORMATS.items():
+        if extension in extensions:
+            return name.encode() if name.encode() in supported_formats else None
+    return extension[1:].encode() if extension[1:].encode() in supported_formats else None
+
+
+def _has_trailer(image_path, size, trailer):
+    with open(image_path, 'rb') as file:
+        file.seek(max(0, size - TRAILER_BYTES))
+        return trailer in file.read()
+
+
+def validate_image(image_path):
+    """
+    检查图片是否为空文件、能否识别文件头、是否被截断以及能否解码，正常返回 None，否则返回原因；
+    Qt 无法解码的格式不做检查（返回 None），不会被误判为损坏
+    """
+    from PyQt5.QtCore import QSize, Qt, qInstallMessageHandler
+    from PyQt5.QtGui import QImageReader
+
+    try:
+        size = os.path.getsize(image_path)
+    except OSError as e:
+        return f'无法访问: {e}'
+    if size == 0:
+        return '空文件'
+    supported_formats = {bytes(image_format).lower() for image_format in QImageReader.supportedImageFormats()}
+    if _qt_format_of(image_path, supported_formats) is None:
+        return None
+
+    reader = QImageReader(image_path)
+    if not reader.canRead():
+        return '无法识别文件头'
+    image_format = bytes(reader.format())
+
+    original_size = reader.size()
+    if original_size.isValid() and max(original_size.width(), original_size.height()) > CHECK_DECODE_SIZE:
+        reader.setScaledSize(original_size.scaled(QSize(CHECK_DECODE_SIZE, CHECK_DECODE_SIZE), Qt.KeepAspectRatio))
+    # 解码器对截断数据只输出警告（如 "premature end of data segment"）并补全图像，需收集警告判断
+    warnings = []
+    previous_handler = qInstallMessageHandler(lambda msg_type, context, message: warnings.append(message))
+    try:
+        image = reader.read()
+    finally:
+        qInstallMessageHandler(previous_handler)
+    if image.isNull():
+        return f'图像损坏: {reader.errorString()}'
+
+    # 结束标记只作为线索：末尾附加了其他数据（如手机写入的附加信息）但能完整解码的图片是正常的
+    trailer = TRAILERS.get(image_format)
+    if trailer is not None and warnings:
+        try:
+            if not _has_trailer(image_path, size, trailer):
+                return '文件不完整'
+        except OSError as e:
+            return f'无法访问: {e}'
+    return None
+
+
+def _validate_worker(image_path):
+    return image_path, validate_image(image_path)
+
+
+def validate_images(image_paths, max_workers=None, progress=None, is_cancelled=None):
+    """
+    在进程池中并行检查图片，返回 {路径: 原因}（只包含有问题的图片）；
+    progress(已完成, 总数)；is_cancelled() 为 True 时返回 None
+    """
+    invalid = {}
+    if not image_paths:
+        return invalid
+    # 由带多个后台线程的 Qt 进程 fork 子进程可能死锁，统一使用 spawn（与 Windows 打包版一致）
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        chunksize = max(1, min(64, len(image_paths) // 64))
+        for done, (image_path, reason) in enumerate(executor.map(_validate_worker, image_paths, chunksize=chunksize), 1):
+            if reason is not None:
+                invalid[image_path] = reason
+            if progress is not None:
+                progress(done, len(image_paths))
+            if is_cancelled is not None and is_cancelled():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return None
+    return invalid
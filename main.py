@@ -4,30 +4,61 @@ Project Name: data_clean
 File Created: 2023.09.14
 Author: ZhangYuetao
 File Name: main.py
-last update： 2024.11.18
+last update： 2026.10.18
 """
 
+from startup_trace import startup_trace  # 需最先导入，以统计各模块的导入耗时
+
+import multiprocessing
 import os.path
 import shutil
 import subprocess
 import sys
-import time
+from collections import Counter
 
 from PyQt5 import QtGui, QtCore
-from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QInputDialog, QToolTip, QMessageBox
-from PyQt5.QtGui import QPixmap, QCursor
-from PyQt5.QtCore import QEvent
-import qt_material
+from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QInputDialog, QToolTip, QMessageBox, QLabel, \
+    QListWidgetItem, QActionGroup
+from PyQt5.QtGui import QPixmap, QCursor, QIcon, QImageReader
+from PyQt5.QtCore import QEvent, QSize, QTimer, pyqtSignal
 
 from CleanWindow import Ui_MainWindow
-from DialogMain import InputDialog
-from utils import get_image_files, read_json, write_json
-import server_connect
+from DialogMain import MODIFIER_KEY_NAMES, InputDialog, get_key_name
+from duplicate_finder import HashCache
+from class_registry import ClassRegistry
+from clean_engine import CleanEngine
+from image_cache import ImageCache
+from image_loader import DecodedImage, ImageLoader
+from image_order import DEFAULT_SORT_MODE, SORT_MODES, parse_shard
+from prefetcher import ImagePrefetcher
+from scan_index import ScanIndex
+from session_journal import SessionJournal
+from stylesheet import apply_stylesheet
+from thumbnail_store import ThumbnailStore
+from workers import BackgroundTask, DuplicateScanThread, ImageScanThread, ThumbnailThread, ValidationThread
+
+startup_trace.mark('导入模块')
 
 
 class MainWindow(QMainWindow, Ui_MainWindow):
+    move_done = pyqtSignal(object)  # 后台移动结束的 MoveTask，由移动线程发出
+
     MIN_PIC_SIZE = 100  # 图像最小值
     AT_LEAST_MAX_PIC_SIZE = 500  # 图像至少的最大值
+    PREFETCH_WINDOW = 3  # 前后各预读的图片数量
+    PREFETCH_MEMORY_BUDGET = 256 * 1024 * 1024  # 预读图片内存上限（字节）
+    DECODED_CACHE_BYTES = 512 * 1024 * 1024  # 解码图片 LRU 缓存上限（字节）
+    SCALED_CACHE_BYTES = 128 * 1024 * 1024  # 缩放后图片 LRU 缓存上限（字节）
+    FILE_MOVE_WORKERS = 4  # 后台移动文件的线程数
+    BATCH_PAGE_SIZE = 200  # 批量模式下缩略图列表显示的图片数量
+    THUMBNAIL_SIZE = 96  # 缩略图尺寸
+    THUMBNAIL_STORE_BYTES = 1024 * 1024 * 1024  # 磁盘缩略图库容量上限（字节）
+    DUPLICATE_FOLDER = '重复图片'  # 归档重复图片的类别文件夹
+    DUPLICATE_THRESHOLD = 4  # 近似重复的 dHash 汉明距离上限
+    INVALID_FOLDER = '损坏图片'  # 隔离空文件与损坏图片的类别文件夹
+    JOURNAL_SYNC_INTERVAL_MS = 2000  # 会话日志定时落盘的间隔（毫秒）
+    VERSION_CHECK_TIMEOUT = 10  # 后台检查版本/获取更新日志的超时时间（秒）
+    STARTUP_TRACE_PATH = r'settings/startup_trace.log'  # 启动耗时报告保存路径
 
     def __init__(self, parent=None):
         super(MainWindow, self).__init__(parent)
@@ -35,19 +66,46 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setupUi(self)
         self.setWindowIcon(QtGui.QIcon("xey.ico"))
         self.setWindowTitle("数据清洗软件V4.3")
+        startup_trace.mark('构建界面')
 
         self.index = 0  # 当前显示的图片索引
         self.dir_path = ''  # 图片文件夹路径
-        self.image_files = []  # 图片文件列表
+        self.scan_thread = None  # 后台扫描文件夹的线程
+        self.sort_mode = DEFAULT_SORT_MODE  # 图片排序方式
+        self.shard = None  # (分片序号, 分片数)，多人分片清洗同一文件夹时只加载其中一片
         self.save_path = ''  # 保存图片的路径
-        self.redo_paths = []  # 撤销操作的路径栈
+        # 清洗核心（待清洗队列、分类移动与撤回），与命令行工具共用
+        self.engine = CleanEngine(MainWindow.FILE_MOVE_WORKERS, on_move_finished=self.move_done.emit,
+                                  scan_index=ScanIndex())
+        self.move_status_label = QLabel()  # 状态栏中显示排队/失败的移动数量
+        self.thumbnail_thread = None  # 后台解码缩略图的线程
+        self.duplicate_thread = None  # 后台查找重复图片的线程
+        self.validation_thread = None  # 后台检查损坏图片的线程
+        self.hash_cache = HashCache()  # 文件哈希缓存，重复查找只计算新增或变化的文件
+        self.journal = SessionJournal()  # 会话日志，用于崩溃后恢复进度与撤回记录
+        self.journal_position = None  # 日志中最近记录的当前图片路径
+        self.resume_path = None  # 恢复会话时需要跳转到的图片路径
+        self.journal_timer = QTimer(self)  # 定时将会话日志落盘
         self.pic_ve = MainWindow.MIN_PIC_SIZE  # 图片显示的垂直尺寸
         self.pic_ho = MainWindow.MIN_PIC_SIZE  # 图片显示的水平尺寸
-        self.classes = {}  # 分类按钮与文件名的映射
         self.classify_button_json_path = r'settings/classify_button.json'  # json文件路径，用于保存分类按钮信息
+        self.class_registry = ClassRegistry(self.classify_button_json_path, parent=self)  # 分类类别注册表
         self.current_classes = None  # 当前选中的分类
+        self.image_loader = ImageLoader(ImageCache(MainWindow.DECODED_CACHE_BYTES))  # 图像解码器（带解码缓存）
+        self.scaled_cache = ImageCache(MainWindow.SCALED_CACHE_BYTES)  # 缩放后 QPixmap 缓存，仅在界面线程使用
+        self.thumbnail_store = ThumbnailStore(max_bytes=MainWindow.THUMBNAIL_STORE_BYTES)  # 磁盘缩略图库
+        self.prefetcher = ImagePrefetcher(self.image_loader, MainWindow.PREFETCH_WINDOW,
+                                          MainWindow.PREFETCH_MEMORY_BUDGET, self.thumbnail_store)  # 后台预读
+        self.current_image_path = None  # 当前已解码图片的路径
+        self.current_is_placeholder = False  # 当前显示的是否为缩略图库中的占位图
+        self.current_file_key = None  # 当前图片的 (路径, mtime, 文件大小)
+        self.current_image = None  # 当前已解码的图片（DecodedImage），供尺寸计算与显示共用
+        self.current_pixmap = None  # 当前图片转换后的 QPixmap
         self.current_software_path = self.get_file_path()
-        self.current_software_version = server_connect.get_current_software_version(self.current_software_path)
+
+        self.version_task = None  # 后台检查版本的任务
+        self.update_log_task = None  # 后台获取更新日志的任务
+        startup_trace.mark('初始化缓存与后台线程')
 
         self.insert_button_window = None  # 插入按钮窗口
         self.is_insert_button_window_open = False  # 标志 InputDialog 是否已打开
@@ -60,32 +118,69 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.insert_pushButton.clicked.connect(self.open_insert_button_dialog)
         self.delete_pushButton.clicked.connect(self.delete_classes)
         self.software_update_action.triggered.connect(self.update_software)
+        self.move_done.connect(self.move_finished)
+        self.prefetcher.image_ready.connect(self.prefetched_image_ready)
+        self.class_registry.class_added.connect(self.class_added)
+        self.class_registry.class_renamed.connect(self.class_renamed)
+        self.class_registry.class_removed.connect(self.class_removed)
+        self.journal_timer.timeout.connect(self.sync_journal)
+        self.journal_timer.start(MainWindow.JOURNAL_SYNC_INTERVAL_MS)
+        self.class_registry.save_failed.connect(lambda error: self.info_label.setText(f'分类信息保存失败: {error}'))
+        self.batch_mode_action.toggled.connect(self.set_batch_mode)
+        self.dedup_action.toggled.connect(self.set_dedup_enabled)
+        self.validate_action.toggled.connect(self.set_validation_enabled)
+        self.shard_action.triggered.connect(self.set_shard)
+        self.sort_action_group = QActionGroup(self)  # 排序方式单选
+        for sort_mode, title in SORT_MODES.items():
+            action = self.sort_menu.addAction(title)
+            action.setCheckable(True)
+            action.setData(sort_mode)
+            self.sort_action_group.addAction(action)
+        self.sort_action_group.triggered.connect(lambda action: self.set_sort_mode(action.data()))
+        self.update_sort_actions()
+        self.statusbar.addPermanentWidget(self.move_status_label)
 
         # 添加listWidget双击事件，用于重命名分类
         self.classify_buttons_listWidget.itemDoubleClicked.connect(self.rename_class)
         # 安装事件过滤器，用于显示工具提示
         self.classify_buttons_listWidget.viewport().installEventFilter(self)
+        # 安装事件过滤器，用于批量模式下拦截分类快捷键
+        self.thumbnail_listWidget.installEventFilter(self)
+        # 安装事件过滤器，用于记录首次绘制的时间
+        self.centralwidget.installEventFilter(self)
+        self.thumbnail_listWidget.hide()
 
         self.control_enabled(False)
         self.save_pushButton.setEnabled(False)
         self.info_label.setText('请导入需要清洗的文件夹')
         self.setup_sliders()  # 初始化滑块
         self.load_classes()  # 加载分类信息
-        self.auto_update()
+        startup_trace.mark('加载分类信息')
+        QTimer.singleShot(0, self.offer_resume)  # 窗口显示后再询问是否恢复上次会话
+        QTimer.singleShot(0, self.auto_update)  # 窗口显示后在后台检查版本
         self.init_update()
+        startup_trace.mark('窗口初始化完成')
+
+    @property
+    def image_files(self):
+        """待清洗图片队列（ImageSequence）"""
+        return self.engine.image_files
 
     def init_update(self):
         dir_path = os.path.dirname(self.current_software_path)
         dir_name = os.path.basename(dir_path)
         if dir_name == 'temp':
+            import server_connect  # 更新相关模块仅在需要时导入，不拖慢启动
+
             old_dir_path = os.path.dirname(dir_path)
             for file in os.listdir(old_dir_path):
                 if file.endswith('.exe'):
                     old_software = os.path.join(old_dir_path, file)
-                    os.remove(old_software)
-            shutil.copy2(self.current_software_path, old_dir_path)
+                    # 旧程序可能尚未完全退出，占用解除后立即删除
+                    server_connect.retry_until_released(os.remove, old_software)
             new_file_path = os.path.join(old_dir_path, os.path.basename(self.current_software_path))
-            if os.path.exists(new_file_path) and server_connect.is_file_complete(new_file_path):
+            server_connect.copy_file_atomic(self.current_software_path, new_file_path)
+            if os.path.exists(new_file_path):
                 msg_box = QMessageBox(self)  # 创建一个新的 QMessageBox 对象
                 reply = msg_box.question(self, '更新完成', '软件更新完成，需要立即重启吗？',
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
@@ -93,22 +188,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
                 if reply == QMessageBox.Yes:
                     subprocess.Popen(new_file_path)
-                    time.sleep(1)
                     sys.exit("程序已退出")
                 else:
                     sys.exit("程序已退出")
         else:
-            is_updated = 0
-            for file in os.listdir(dir_path):
-                if file == 'temp':
-                    is_updated = 1
-                    shutil.rmtree(file)
-            if is_updated == 1:
-                try:
-                    text = server_connect.get_update_log('数据清洗软件')
-                    QMessageBox.information(self, '更新成功', f'更新成功！\n{text}')
-                except Exception as e:
-                    QMessageBox.critical(self, '更新成功', f'日志加载失败: {str(e)}')
+            temp_dir = os.path.join(dir_path, 'temp')
+            if os.path.exists(temp_dir):
+                import server_connect
+
+                # temp 中的程序可能尚未完全退出，占用解除后立即删除
+                server_connect.retry_until_released(shutil.rmtree, temp_dir)
+                # 在后台获取更新日志，不阻塞窗口显示
+                self.update_log_task = BackgroundTask(server_connect.get_update_log, '数据清洗软件',
+                                                      timeout=MainWindow.VERSION_CHECK_TIMEOUT, parent=self)
+                self.update_log_task.task_finished.connect(self.update_log_loaded)
+                self.update_log_task.start()
+
+    def update_log_loaded(self, text, error):
+        if error is None:
+            QMessageBox.information(self, '更新成功', f'更新成功！\n{text}')
+        else:
+            QMessageBox.critical(self, '更新成功', f'日志加载失败: {str(error)}')
 
     @staticmethod
     def get_file_path():
@@ -125,11 +225,35 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         dir_path = os.path.dirname(self.current_software_path)
         dir_name = os.path.basename(dir_path)
         if dir_name != 'temp':
-            if server_connect.check_version(self.current_software_version) == 1:
-                self.update_software()
+            self.start_version_check(silent=True)
 
     def update_software(self):
-        update_way = server_connect.check_version(self.current_software_version)
+        self.start_version_check(silent=False)
+
+    def start_version_check(self, silent):
+        """在后台检查版本，silent 为 True 时仅在发现新版本时提示（启动时的自动检查）"""
+        if self.version_task is not None:
+            return  # 上一次检查尚未结束
+        self.software_update_action.setEnabled(False)
+        self.version_task = BackgroundTask(self.fetch_update_way, timeout=MainWindow.VERSION_CHECK_TIMEOUT,
+                                           parent=self)
+        self.version_task.task_finished.connect(
+            lambda update_way, error: self.version_checked(update_way, error, silent))
+        self.version_task.start()
+
+    def fetch_update_way(self):
+        """在后台线程中执行：比较本地与服务器版本，返回 check_version 的结果"""
+        import server_connect
+
+        return server_connect.check_version(server_connect.get_current_software_version(self.current_software_path))
+
+    def version_checked(self, update_way, error, silent):
+        self.version_task = None
+        self.software_update_action.setEnabled(True)
+        if error is not None:
+            update_way = -1  # 超时按网络未连接处理
+        if silent and update_way != 1:
+            return
         if update_way == -1:
             # 网络未连接，弹出提示框
             QMessageBox.warning(self, '更新提示', '网络未连接，暂时无法更新')
@@ -144,6 +268,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             msg_box.raise_()  # 确保弹窗显示在最上层
 
             if reply == QMessageBox.Yes:
+                import server_connect
+
                 try:
                     server_connect.update_software(os.path.dirname(self.current_software_path), '数据清洗软件')
                     text = server_connect.get_update_log('数据清洗软件')
@@ -177,26 +303,317 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         """打开文件夹对话框以选择图像文件夹，并加载图像文件"""
         try:
             dir_path = QFileDialog.getExistingDirectory(self)
-            if dir_path:
-                self.dir_path = dir_path
-                self.image_files = get_image_files(dir_path)
-                if self.image_files:
-                    self.save_pushButton.setEnabled(True)
-                    self.info_label.setText('已导入文件夹，请设置保存地址')
-                    self.index = 0
-                    self.get_max_fit_size()
-                    self.show_image()  # 显示第一张图片
-                else:
-                    self.info_label.setText('文件夹中不存在图片，请重新导入新的文件夹')
+            if dir_path and self.confirm_reload('打开文件夹'):
+                self.load_folder(dir_path)
         except Exception as e:
             self.info_label.setText(f"打开文件时出错: {e}")
 
+    def load_folder(self, dir_path):
+        """按当前排序方式与分片重新加载文件夹，开始新的会话"""
+        self.dir_path = dir_path
+        self.prefetcher.invalidate()
+        self.engine.reset()
+        self.index = 0
+        self.journal.start(dir_path, self.sort_mode, self.shard)
+        if self.save_path:
+            self.journal.record('save_path', save_path=self.save_path)
+        self.start_scan(dir_path)
+
+    def update_sort_actions(self):
+        for action in self.sort_action_group.actions():
+            action.setChecked(action.data() == self.sort_mode)
+        self.shard_action.setText(f'分片清洗（当前 {self.shard[0] + 1}/{self.shard[1]}）...' if self.shard
+                                  else '分片清洗...')
+
+    def set_sort_mode(self, sort_mode):
+        """切换排序方式，已打开文件夹时按新顺序重新加载"""
+        if sort_mode == self.sort_mode:
+            return
+        if not self.confirm_reload('切换排序方式'):
+            self.update_sort_actions()  # 恢复原排序方式的勾选
+            return
+        self.sort_mode = sort_mode
+        self.update_sort_actions()
+        if self.dir_path:
+            self.load_folder(self.dir_path)
+
+    def confirm_reload(self, title):
+        """加载文件夹会清空撤回记录与会话日志中的分类记录，有可撤回的分类时先询问"""
+        if not self.dir_path or not self.engine.undo_stack:
+            return True
+        reply = QMessageBox.question(self, title, f'{title}后，已完成的{len(self.engine.undo_stack)}次分类将无法撤回，是否继续？',
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        return reply == QMessageBox.Yes
+
+    def set_shard(self):
+        """设置分片 i/K：文件夹按相对路径哈希划分为 K 片，各片互不重叠，多人或多台机器可同时清洗"""
+        current = f'{self.shard[0] + 1}/{self.shard[1]}' if self.shard else ''
+        text, ok = QInputDialog.getText(self, "分片清洗", "分片（如 1/4 表示共 4 片中的第 1 片，留空则不分片）:",
+                                        text=current)
+        if not ok:
+            return
+        try:
+            shard = parse_shard(text.strip()) if text.strip() else None
+        except ValueError:
+            self.info_label.setText(f'无效的分片: {text}，请输入 i/K 格式，如 1/4')
+            return
+        if shard == self.shard or not self.confirm_reload('切换分片'):
+            return
+        self.shard = shard
+        self.update_sort_actions()
+        if self.dir_path:
+            self.load_folder(self.dir_path)
+
+    def offer_resume(self):
+        """启动时检测会话日志，询问是否恢复上次未完成的清洗"""
+        try:
+            state = self.journal.load()
+        except (OSError, ValueError, KeyError):
+            return
+        if state is None or not os.path.isdir(state.dir_path):
+            return
+        reply = QMessageBox.question(self, '恢复清洗', f'检测到上次未完成的清洗记录：\n{state.dir_path}\n是否恢复到上次的位置？',
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply == QMessageBox.Yes:
+            self.resume_session(state)
+
+    def resume_session(self, state):
+        """按日志恢复文件夹、保存路径、撤回记录与当前位置"""
+        self.dir_path = state.dir_path
+        self.sort_mode = state.sort_mode if state.sort_mode in SORT_MODES else DEFAULT_SORT_MODE
+        self.shard = state.shard
+        self.update_sort_actions()
+        self.prefetcher.invalidate()
+        self.engine.reset()
+        self.index = 0
+        state.undo_stack = self.engine.restore_history(state.undo_stack)
+        self.journal.rewrite(state)
+        self.resume_path = state.current
+        if state.save_path:
+            self.save_path = state.save_path
+            self.control_enabled(True)
+        self.start_scan(self.dir_path)
+
+    def record_journal(self, op, **fields):
+        """追加一条会话日志，并附带当前图片路径"""
+        self.journal_position = self.current_image_path if self.image_files else None
+        self.journal.record(op, current=self.journal_position, **fields)
+
+    def sync_journal(self):
+        """定时落盘会话日志，当前位置有变化时补记一条"""
+        if self.resume_path is None and self.image_files and self.current_image_path != self.journal_position:
+            self.record_journal('pos')
+        self.journal.sync()
+
+    def start_scan(self, dir_path):
+        """在后台线程中扫描文件夹，扫描结果分批追加到图片列表"""
+        self.stop_scan()
+        self.stop_validation()
+        self.stop_duplicate_scan()
+        self.info_label.setText(f'正在扫描文件夹（分片 {self.shard[0] + 1}/{self.shard[1]}）...' if self.shard
+                                else '正在扫描文件夹...')
+        self.scan_thread = ImageScanThread(dir_path, self.engine, self.sort_mode, self.shard)
+        self.scan_thread.files_found.connect(self.add_scanned_files)
+        self.scan_thread.finished.connect(self.scan_finished)
+        self.scan_thread.start()
+
+    def stop_scan(self):
+        """取消正在进行的扫描（如重新打开其他文件夹时）"""
+        if self.scan_thread is not None:
+            self.scan_thread.cancel()
+            self.scan_thread.wait()
+            self.scan_thread = None
+
+    def add_scanned_files(self, image_files):
+        if self.sender() is not self.scan_thread:
+            return  # 已取消的扫描残留的信号
+        is_first_batch = not self.image_files
+        start_index = len(self.image_files)
+        self.engine.extend(image_files)
+        if is_first_batch:
+            self.save_pushButton.setEnabled(True)
+            if not self.save_path:
+                self.info_label.setText('已导入文件夹，请设置保存地址')
+            self.index = 0
+            self.get_max_fit_size()
+            self.show_image()  # 显示第一张图片
+        else:
+            self.show_current_nums()
+        if self.resume_path is not None and self.resume_path in image_files:
+            # 恢复会话：扫描到上次的图片后跳转过去
+            self.index = start_index + image_files.index(self.resume_path)
+            self.resume_path = None
+            self.get_max_fit_size()
+            self.show_image()
+
+    def scan_finished(self):
+        if self.sender() is not self.scan_thread:
+            return
+        self.scan_thread = None
+        self.resume_path = None
+        self.engine.finish_restore()
+        if not self.image_files:
+            self.info_label.setText('文件夹中不存在图片，请重新导入新的文件夹')
+        elif self.validate_action.isChecked():
+            self.start_validation()  # 检查结束后再查重，损坏图片不参与查重
+        elif self.dedup_action.isChecked():
+            self.start_duplicate_scan()
+
+    def set_validation_enabled(self, enabled):
+        """勾选检查损坏图片时，若文件夹已扫描完成则立即开始检查"""
+        if not enabled:
+            running = self.validation_thread is not None
+            self.stop_validation()
+            # 检查被取消时补上原本排在其后的查重
+            if running and self.image_files and self.dedup_action.isChecked():
+                self.start_duplicate_scan()
+        elif self.image_files and self.scan_thread is None:
+            self.start_validation()
+
+    def start_validation(self):
+        """在后台检查当前队列中的空文件、截断与损坏图片"""
+        self.stop_validation()
+        self.validation_thread = ValidationThread(list(self.image_files))
+        self.validation_thread.progress.connect(
+            lambda done, total: self.statusbar.showMessage(f'正在检查损坏图片 {done}/{total}', 2000))
+        self.validation_thread.invalid_found.connect(self.invalid_found)
+        self.validation_thread.start()
+
+    def stop_validation(self):
+        if self.validation_thread is not None:
+            self.validation_thread.cancel()
+            self.validation_thread.wait()
+            self.validation_thread = None
+
+    def invalid_found(self, invalid):
+        """询问如何处理有问题的图片：移动到损坏图片文件夹（可撤回），或跳过（只移出队列，不移动文件）"""
+        if self.sender() is not self.validation_thread:
+            return
+        self.validation_thread = None
+        self.handle_invalid(invalid)
+        if self.image_files and self.dedup_action.isChecked():
+            self.start_duplicate_scan()
+
+    def handle_invalid(self, invalid):
+        # 只处理仍在队列中的图片（检查期间可能已被分类）
+        invalid_slots = [slot for slot in self.image_files.alive_slots()
+                         if self.image_files.path_at_slot(slot) in invalid]
+        if not invalid_slots:
+            self.statusbar.showMessage('未发现损坏图片', 5000)
+            return
+        reasons = Counter(invalid[self.image_files.path_at_slot(slot)].split(':')[0] for slot in invalid_slots)
+        summary = '，'.join(f'{reason}{count}张' for reason, count in reasons.items())
+
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle('检查损坏图片')
+        msg_box.setText(f'发现{len(invalid_slots)}张有问题的图片：{summary}')
+        msg_box.setDetailedText('\n'.join(f'{self.image_files.path_at_slot(slot)}: '
+                                          f'{invalid[self.image_files.path_at_slot(slot)]}' for slot in invalid_slots))
+        move_button = msg_box.addButton(f'移动到{MainWindow.INVALID_FOLDER}', QMessageBox.AcceptRole)
+        skip_button = msg_box.addButton('跳过（不显示）', QMessageBox.ActionRole)
+        msg_box.addButton('忽略', QMessageBox.RejectRole)
+        move_button.setEnabled(bool(self.save_path))
+        msg_box.exec_()
+
+        current_slot = self.image_files.slot_at(self.index)
+        if msg_box.clickedButton() is move_button:
+            task, skipped_slots = self.engine.classify(
+                invalid_slots, os.path.join(self.save_path, MainWindow.INVALID_FOLDER))
+            if task is None:
+                self.info_label.setText(f'{MainWindow.INVALID_FOLDER}中已存在同名文件，未移动')
+                return
+            self.record_journal('move', moves=self.engine.move_records(task))
+            self.info_label.setText(f'已将{len(task.moves)}张有问题的图片移动到{MainWindow.INVALID_FOLDER}'
+                                    + (f'，{len(skipped_slots)}张因同名冲突未移动' if skipped_slots else ''))
+        elif msg_box.clickedButton() is skip_button:
+            # 只移出队列，不移动文件
+            for slot in invalid_slots:
+                self.image_files.remove_slot(slot)
+            self.info_label.setText(f'已跳过{len(invalid_slots)}张有问题的图片')
+        else:
+            return
+        if self.image_files:
+            # 保持当前图片不变；当前图片被去除时显示其后的第一张
+            self.index = min(self.image_files.index_of_slot(current_slot), len(self.image_files) - 1)
+        self.show_after_remove()
+
+    def set_dedup_enabled(self, enabled):
+        """勾选查重时，若文件夹已扫描完成则立即开始查找"""
+        if not enabled:
+            self.stop_duplicate_scan()
+        elif self.image_files and self.scan_thread is None and self.validation_thread is None:
+            self.start_duplicate_scan()
+
+    def start_duplicate_scan(self):
+        """在后台查找当前队列中的重复图片（完全相同与近似重复）"""
+        self.stop_duplicate_scan()
+        self.duplicate_thread = DuplicateScanThread(list(self.image_files), self.hash_cache,
+                                                    MainWindow.DUPLICATE_THRESHOLD)
+        self.duplicate_thread.progress.connect(
+            lambda done, total: self.statusbar.showMessage(f'正在查找重复图片 {done}/{total}', 2000))
+        self.duplicate_thread.duplicates_found.connect(self.duplicates_found)
+        self.duplicate_thread.start()
+
+    def stop_duplicate_scan(self):
+        if self.duplicate_thread is not None:
+            self.duplicate_thread.cancel()
+            self.duplicate_thread.wait()
+            self.duplicate_thread = None
+
+    def duplicates_found(self, clusters):
+        """询问如何处理重复簇：归档到重复类别文件夹，或折叠为只显示代表图片"""
+        if self.sender() is not self.duplicate_thread:
+            return
+        self.duplicate_thread = None
+        # 只处理仍在队列中的图片（查找期间可能已被分类）
+        slot_by_path = {self.image_files.path_at_slot(slot): slot for slot in self.image_files.alive_slots()}
+        duplicate_slots = [slot_by_path[image_path] for cluster in clusters for image_path in cluster[1:]
+                           if image_path in slot_by_path]
+        if not duplicate_slots:
+            self.statusbar.showMessage('未发现重复图片', 5000)
+            return
+
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle('查找重复图片')
+        msg_box.setText(f'发现{len(clusters)}组重复图片，共{len(duplicate_slots)}张可去除（每组保留第一张）')
+        details = []
+        for cluster in clusters:
+            members = [image_path for image_path in cluster[1:] if image_path in slot_by_path]
+            if members:
+                details.append('\n'.join([f'保留: {cluster[0]}'] + [f'    {image_path}' for image_path in members]))
+        msg_box.setDetailedText('\n\n'.join(details))
+        file_button = msg_box.addButton(f'归档到{MainWindow.DUPLICATE_FOLDER}', QMessageBox.AcceptRole)
+        collapse_button = msg_box.addButton('折叠（不显示）', QMessageBox.ActionRole)
+        msg_box.addButton('忽略', QMessageBox.RejectRole)
+        file_button.setEnabled(bool(self.save_path))
+        msg_box.exec_()
+
+        current_slot = self.image_files.slot_at(self.index)
+        if msg_box.clickedButton() is file_button:
+            task, _ = self.engine.classify(duplicate_slots, os.path.join(self.save_path, MainWindow.DUPLICATE_FOLDER))
+            if task is None:
+                return
+            self.record_journal('move', moves=self.engine.move_records(task))
+            self.info_label.setText(f'已将{len(task.moves)}张重复图片归档到{MainWindow.DUPLICATE_FOLDER}')
+        elif msg_box.clickedButton() is collapse_button:
+            # 只移出队列，不移动文件
+            for slot in duplicate_slots:
+                self.image_files.remove_slot(slot)
+            self.info_label.setText(f'已折叠{len(duplicate_slots)}张重复图片')
+        else:
+            return
+        if self.image_files:
+            # 保持当前图片不变；当前图片被去除时显示其后的第一张
+            self.index = min(self.image_files.index_of_slot(current_slot), len(self.image_files) - 1)
+        self.show_after_remove()
+
     def get_save_path(self):
         """打开文件夹对话框以选择保存路径，并启用相关控件"""
         save_path = QFileDialog.getExistingDirectory(self)
         if save_path:
             self.save_path = save_path
             self.control_enabled(True)
+            self.journal.record('save_path', save_path=save_path)
             self.info_label.setText('设置成功！请在左侧配置分类类别快捷键与文件名')
 
     def show_prev_image(self):
@@ -213,25 +630,92 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.show_image()
             self.info_label.clear()
 
+    def load_current_image(self):
+        """
+        解码当前索引的图片，同一张图片只解码一次，供尺寸计算与显示共用；
+        优先取用后台预读结果，其次先显示磁盘缩略图库中的占位图，等后台解码完成后再替换
+        """
+        image_path = self.image_files[self.index]
+        if image_path != self.current_image_path:
+            decoded = self.prefetcher.get(image_path)
+            is_placeholder = False
+            if decoded is None:
+                decoded = self.load_cached_rendition(image_path)
+                is_placeholder = decoded is not None
+            if decoded is None:
+                decoded = self.image_loader.decode(image_path, self.image_label.size())
+            self.set_current_image(image_path, decoded, is_placeholder)
+        return self.current_image
+
+    def load_cached_rendition(self, image_path):
+        """读取磁盘缩略图库中的预缩放图作为占位，原图尺寸只读取文件头，未命中返回 None"""
+        image = self.thumbnail_store.load(image_path, max(self.image_label.width(), self.image_label.height()))
+        if image is None:
+            return None
+        original_size = QImageReader(image_path).size()
+        if not original_size.isValid():
+            return None
+        return DecodedImage(image, original_size.width(), original_size.height())
+
+    def prefetched_image_ready(self, image_path):
+        """后台解码完成当前图片后，替换掉占位图"""
+        if self.current_is_placeholder and image_path == self.current_image_path:
+            decoded = self.prefetcher.get(image_path)
+            if decoded is not None:
+                self.set_current_image(image_path, decoded)
+                self.show_image()
+
+    def set_current_image(self, image_path, decoded, is_placeholder=False):
+        self.current_image_path = image_path
+        self.current_is_placeholder = is_placeholder
+        self.current_file_key = ImageCache.file_key(image_path)
+        self.current_image = decoded
+        self.current_pixmap = None if decoded.image.isNull() else QPixmap.fromImage(decoded.image)
+        self.show_cache_stats()
+
+    def show_cache_stats(self):
+        """在状态栏显示解码耗时与缓存命中统计"""
+        self.statusbar.showMessage(f'{self.image_loader.stats_text()} | '
+                                   f'解码缓存: {self.image_loader.cache.stats_text()} | '
+                                   f'缩放缓存: {self.scaled_cache.stats_text()}')
+
+    def get_scaled_pixmap(self):
+        """获取按当前显示尺寸缩放后的图片，滑块拖动与来回切换时直接取缓存"""
+        key = ImageCache.make_key(self.current_file_key, self.pic_ho, self.pic_ve)
+        scaled_pixmap = self.scaled_cache.get(key) if key is not None else None
+        if scaled_pixmap is None:
+            scaled_pixmap = self.current_pixmap.scaled(self.pic_ho, self.pic_ve)
+            if not self.current_is_placeholder:
+                nbytes = scaled_pixmap.width() * scaled_pixmap.height() * scaled_pixmap.depth() // 8
+                self.scaled_cache.put(key, scaled_pixmap, nbytes)
+        self.show_cache_stats()
+        return scaled_pixmap
+
     def show_image(self):
         image_path = self.image_files[self.index]
-        pixmap = QPixmap(image_path)
-        if pixmap.isNull():
+        decoded = self.load_current_image()
+        if self.current_pixmap is None:
             self.info_label.setText(f"图像{image_path}加载错误")
         else:
-            scaled_pixmap = pixmap.scaled(self.pic_ho, self.pic_ve)
-            self.image_label.setPixmap(scaled_pixmap)
+            image = decoded.image
+            is_downscaled = image.width() < decoded.width or image.height() < decoded.height
+            is_enlarged = self.pic_ho > image.width() or self.pic_ve > image.height()
+            if is_downscaled and is_enlarged and not self.current_is_placeholder:
+                # 滑块放大超过预缩放尺寸时，按原图重新解码
+                self.set_current_image(image_path, self.image_loader.decode(image_path))
+            self.image_label.setPixmap(self.get_scaled_pixmap())
             self.show_current_nums()
+        self.prefetcher.update(self.image_files, self.index, self.image_label.size())
 
     def get_max_fit_size(self):
         """获取当前图片的最大适应尺寸"""
         image_path = self.image_files[self.index]
-        pixmap = QPixmap(image_path)
-        if pixmap.isNull():
+        decoded = self.load_current_image()
+        if self.current_pixmap is None:
             self.info_label.setText(f"图像{image_path}打开错误")
         else:
-            # 根据图像尺寸计算比例因子
-            width, height = pixmap.width(), pixmap.height()
+            # 根据原图尺寸计算比例因子
+            width, height = decoded.width, decoded.height
             height_value = self.image_label.height() / height
             width_value = self.image_label.width() / width
             scale_factor = min(height_value, width_value)
@@ -246,41 +730,125 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def save_image(self, folder_name):
         self.info_label.clear()
         if self.image_files:
-            image_path = self.image_files[self.index]
             need_path = os.path.join(self.save_path, folder_name)
 
-            if not os.path.isdir(need_path):
-                os.mkdir(need_path)
-
-            last_path = os.path.join(need_path, os.path.basename(image_path))
-            image_dir_path = os.path.dirname(image_path)
-
-            if os.path.exists(last_path):
+            # 移动交由后台线程完成，界面直接切换到下一张
+            task, skipped_slots = self.engine.classify([self.image_files.slot_at(self.index)], need_path)
+            if task is None:
+                last_path = os.path.join(need_path, os.path.basename(self.image_files.path_at_slot(skipped_slots[0])))
                 self.show_next_image()
                 self.info_label.setText(f'目标地址存在同名文件{last_path}，已跳过')
                 return
 
-            shutil.move(image_path, need_path)
-            self.redo_paths.append([last_path, image_dir_path])
-            self.image_files.remove(image_path)
-
-            if self.image_files:
-                if self.index >= len(self.image_files) - 1:
-                    self.index = len(self.image_files) - 1
-                self.show_image()
-                self.info_label.clear()
-            else:
-                self.show_current_nums()
-                self.image_label.clear()
+            self.show_after_remove()
+            self.record_journal('move', moves=self.engine.move_records(task))
+            if not self.image_files:
                 self.info_label.setText('无剩余图片')
 
+    def save_images_batch(self, folder_name):
+        """将缩略图列表中选中的图片作为一次操作分类到同一文件夹"""
+        slots = [item.data(QtCore.Qt.UserRole) for item in self.thumbnail_listWidget.selectedItems()]
+        task, skipped_slots = self.engine.classify(slots, os.path.join(self.save_path, folder_name))
+        moved_count = 0
+        if task is not None:
+            moved_count = len(task.moves)
+            self.show_after_remove()
+            self.record_journal('move', moves=self.engine.move_records(task))
+        message = f'已批量分类{moved_count}张图片到{folder_name}'
+        if skipped_slots:
+            message += f'，{len(skipped_slots)}张因目标地址存在同名文件已跳过'
+        self.info_label.setText(message)
+
+    def show_after_remove(self):
+        """图片移出队列后刷新显示"""
+        self.show_move_status()
+        if self.image_files:
+            if self.index >= len(self.image_files) - 1:
+                self.index = len(self.image_files) - 1
+            self.show_image()
+        else:
+            self.prefetcher.invalidate()
+            self.show_current_nums()
+            self.image_label.clear()
+        self.refresh_thumbnails()
+
+    def move_finished(self, task):
+        """后台移动结束，将移动失败的图片放回队列"""
+        if task.errors:
+            current_slot = self.image_files.slot_at(self.index) if self.image_files else None
+            if self.engine.restore_failed(task):
+                self.record_journal('failed', sources=[src_path for src_path, _ in task.errors])
+                if current_slot is None:
+                    self.index = 0
+                    self.get_max_fit_size()
+                    self.show_image()
+                else:
+                    self.index = self.image_files.index_of_slot(current_slot)
+                    self.show_current_nums()
+                self.refresh_thumbnails()
+            src_path, error = task.errors[0]
+            self.info_label.setText(f'移动{src_path}失败: {error}')
+        self.show_move_status()
+
+    def show_move_status(self):
+        self.move_status_label.setText(f'待移动: {self.engine.mover.pending_count()}  '
+                                       f'移动失败: {self.engine.mover.failed_count}')
+
     def redo_process(self):
-        if self.nums_label.text() != '' and self.redo_paths:
-            last_path, image_dir_path = self.redo_paths.pop()
-            shutil.move(last_path, image_dir_path)
-            self.image_files = get_image_files(self.dir_path)
+        if self.nums_label.text() != '' and self.engine.undo_stack:
+            slots = self.engine.undo()
+            self.index = self.image_files.index_of_slot(min(slots))
+            self.get_max_fit_size()
             self.show_image()
-            self.info_label.setText(f'已撤回{image_dir_path}')
+            self.record_journal('undo')
+            self.show_move_status()
+            self.refresh_thumbnails()
+            if len(slots) == 1:
+                self.info_label.setText(f'已撤回{os.path.dirname(self.image_files.path_at_slot(slots[0]))}')
+            else:
+                self.info_label.setText(f'已撤回{len(slots)}张图片')
+
+    def set_batch_mode(self, enabled):
+        """切换批量分类模式：显示缩略图列表，可多选后按分类快捷键一次性分类"""
+        self.thumbnail_listWidget.setVisible(enabled)
+        if enabled:
+            self.refresh_thumbnails()
+        else:
+            self.stop_thumbnails()
+            self.thumbnail_listWidget.clear()
+
+    def refresh_thumbnails(self):
+        """从当前图片开始重新填充缩略图列表"""
+        if not self.batch_mode_action.isChecked():
+            return
+        self.stop_thumbnails()
+        self.thumbnail_listWidget.clear()
+        image_paths = []
+        for index in range(self.index, min(self.index + MainWindow.BATCH_PAGE_SIZE, len(self.image_files))):
+            slot = self.image_files.slot_at(index)
+            image_path = self.image_files.path_at_slot(slot)
+            item = QListWidgetItem(os.path.basename(image_path))
+            item.setData(QtCore.Qt.UserRole, slot)
+            self.thumbnail_listWidget.addItem(item)
+            image_paths.append(image_path)
+        if image_paths:
+            thumbnail_size = QSize(MainWindow.THUMBNAIL_SIZE, MainWindow.THUMBNAIL_SIZE)
+            self.thumbnail_thread = ThumbnailThread(self.image_loader, self.thumbnail_store, image_paths, thumbnail_size)
+            self.thumbnail_thread.thumbnail_ready.connect(self.set_thumbnail)
+            self.thumbnail_thread.start()
+
+    def stop_thumbnails(self):
+        if self.thumbnail_thread is not None:
+            self.thumbnail_thread.cancel()
+            self.thumbnail_thread.wait()
+            self.thumbnail_thread = None
+
+    def set_thumbnail(self, row, image):
+        if self.sender() is not self.thumbnail_thread:
+            return  # 已取消的缩略图线程残留的信号
+        item = self.thumbnail_listWidget.item(row)
+        if item is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
 
     def change_slider_max_value(self, slider_type):
         """根据滑块类型更新滑块的最大值并显示图片"""
@@ -295,13 +863,22 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def load_classes(self):
         self.classify_buttons_listWidget.clear()
-        self.classes = read_json(self.classify_button_json_path, {})
-        self.classify_buttons_listWidget.addItems(self.classes.keys())
+        self.classify_buttons_listWidget.addItems(self.class_registry.classes.keys())
+
+    def class_added(self, class_name):
+        self.classify_buttons_listWidget.addItem(class_name)
+
+    def class_renamed(self, class_name, new_name):
+        for item in self.classify_buttons_listWidget.findItems(class_name, QtCore.Qt.MatchExactly):
+            item.setText(new_name)
+
+    def class_removed(self, class_name):
+        for item in self.classify_buttons_listWidget.findItems(class_name, QtCore.Qt.MatchExactly):
+            self.classify_buttons_listWidget.takeItem(self.classify_buttons_listWidget.row(item))
 
     def open_insert_button_dialog(self):
         if not self.is_insert_button_window_open:
-            self.insert_button_window = InputDialog(parent=self)  # 传递父窗口引用
-            self.insert_button_window.finished.connect(self.load_classes)
+            self.insert_button_window = InputDialog(self.class_registry, parent=self)  # 共用分类注册表
             self.insert_button_window.finished.connect(self.set_insert_button_window_closed)
             self.is_insert_button_window_open = True
             self.insert_button_window.show()
@@ -312,59 +889,90 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def delete_classes(self):
         current_classes = self.classify_buttons_listWidget.currentItem()
         if current_classes:
-            classes_name = current_classes.text()
-            del self.classes[classes_name]
             self.current_classes = None
-            self.save_classes()
-            self.load_classes()
-
-    def save_classes(self):
-        write_json(self.classify_button_json_path, self.classes)
+            self.class_registry.remove(current_classes.text())
 
     def rename_class(self, item):
         """双击重命名选中项"""
         class_name = item.text()
-        if class_name in self.classes:
+        if class_name in self.class_registry.classes:
             new_name, ok = QInputDialog.getText(self, "重命名类别", "新类别名:", text=class_name)
             if ok and new_name:
-                self.classes[new_name] = self.classes.pop(class_name)
-                self.save_classes()
-                self.load_classes()
+                if not self.class_registry.rename(class_name, new_name):
+                    self.info_label.setText(f'类别名{new_name}已存在')
 
     def eventFilter(self, source, event):
         """事件过滤器，用于显示工具提示"""
+        if event.type() == QEvent.Paint and source is self.centralwidget and not startup_trace.finished:
+            startup_trace.mark('首次绘制')
+            startup_trace.finish(MainWindow.STARTUP_TRACE_PATH)
+            self.statusbar.showMessage(f'启动耗时 {startup_trace.total_ms():.0f} ms', 5000)
         if event.type() == QEvent.ToolTip and source is self.classify_buttons_listWidget.viewport():
             item = self.classify_buttons_listWidget.itemAt(event.pos())
             if item:
                 class_name = item.text()
-                if class_name in self.classes:
-                    class_info = self.classes[class_name]
+                if class_name in self.class_registry.classes:
+                    class_info = self.class_registry.classes[class_name]
                     QToolTip.showText(QCursor.pos(), f"类别: {class_name}\n信息: {class_info}")
             return True
+        if event.type() == QEvent.KeyPress and source is self.thumbnail_listWidget:
+            class_info = self.find_class_by_key(event)
+            if class_info is not None:
+                if self.save_path and self.thumbnail_listWidget.selectedItems():
+                    self.save_images_batch(class_info['input_filename'])
+                return True
         return super(MainWindow, self).eventFilter(source, event)
 
+    def closeEvent(self, event):
+        self.stop_scan()
+        self.stop_validation()
+        self.stop_duplicate_scan()
+        self.stop_thumbnails()
+        self.prefetcher.stop()
+        self.engine.close()  # 退出前完成全部排队中的移动
+        self.class_registry.flush()
+        if self.image_files:
+            self.record_journal('pos')
+        self.journal.close()
+        super(MainWindow, self).closeEvent(event)
+
     def keyPressEvent(self, event):
-        if event.key() == QtCore.Qt.Key_A:
+        if event.key() in MODIFIER_KEY_NAMES:
+            return  # 单独按下的修饰键只是组合键的一部分，不触发任何操作
+        key_name = get_key_name(event.key(), int(event.modifiers()))
+        if key_name == 'a':
             self.show_prev_image()
-        elif event.key() == QtCore.Qt.Key_D:
+        elif key_name == 'd':
             self.show_next_image()
-        elif event.key() == QtCore.Qt.Key_S:
+        elif key_name == 's':
             self.redo_process()
         else:
-            # 遍历所有类，检查是否有匹配的快捷键
-            for class_name, class_info in self.classes.items():
-                if 'input_keys' in class_info:
-                    shortcut = class_info['input_keys']
-                    if event.text() == shortcut:
-                        self.save_image(class_info['input_filename'])
-                        break
+            class_info = self.find_class_by_key(event)
+            if class_info is not None:
+                self.save_image(class_info['input_filename'])
 
+    def find_class_by_key(self, event):
+        """通过快捷键反向索引查找按键（含修饰键组合）对应的分类信息，无匹配时返回 None"""
+        if event.key() in MODIFIER_KEY_NAMES:
+            return None
+        return self.class_registry.get_by_key(get_key_name(event.key(), int(event.modifiers())))
 
-if __name__ == "__main__":
+
+def launch(argv):
+    """创建应用与主窗口并显示，返回 (app, 主窗口)；启动基准测试复用同一流程"""
     QApplication.setAttribute(QtCore.Qt.AA_EnableHighDpiScaling)  # 自动适配不同分辨率的显示器
     QApplication.setAttribute(QtCore.Qt.AA_UseHighDpiPixmaps)  # 确保图片也进行高DPI缩放
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
+    startup_trace.mark('创建 QApplication')
     myWin = MainWindow()
-    qt_material.apply_stylesheet(app, theme='default')
+    apply_stylesheet(app, theme='default')
+    startup_trace.mark('应用样式表')
     myWin.show()
+    startup_trace.mark('显示窗口')
+    return app, myWin
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后的程序中使用进程池时需要
+    app, myWin = launch(sys.argv)
     sys.exit(app.exec_())
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: prefetcher.py
+last update： 2026.10.18
+"""
+
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class ImagePrefetcher(QObject):
+    """
+    后台预读环：在工作线程中提前解码并预缩放当前索引前后各 window 张图片（QImage），
+    切换图片时直接取用，避免在界面线程中同步解码；解码结果交给单独的写入线程存入磁盘缩略图库，
+    编码缩略图不会推迟 image_ready 与后续图片的预读
+    """
+    image_ready = pyqtSignal(str)  # 某张图片预读完成
+
+    THUMBNAIL_QUEUE_LIMIT = 32  # 待写入缩略图的最大数量，超出时丢弃最早的（缩略图库只是缓存）
+
+    def __init__(self, image_loader, window=3, memory_budget=256 * 1024 * 1024, thumbnail_store=None, parent=None):
+        super(ImagePrefetcher, self).__init__(parent)
+        self.image_loader = image_loader
+        self.thumbnail_store = thumbnail_store  # 可选的 ThumbnailStore
+        self.window = window  # 前后各预读的图片数量
+        self.memory_budget = memory_budget  # 预读图片占用内存上限（字节）
+
+        self._condition = threading.Condition()
+        self._images = {}  # 路径 -> DecodedImage
+        self._bytes = 0  # 已缓存图片占用的字节数
+        self._queue = []  # 待解码路径，按优先级排序
+        self._wanted = set()  # 当前预读窗口内的路径
+        self._fit_size = None  # 预缩放目标尺寸
+        self._generation = 0  # 每次失效时递增，丢弃过期的解码结果
+        self._stopped = False
+        self._pending_thumbnails = OrderedDict()  # 待写入缩略图库的 路径 -> QImage，受 _condition 保护
+
+        self._thread = threading.Thread(target=self._run, name='ImagePrefetcher', daemon=True)
+        self._thread.start()
+        self._thumbnail_thread = None
+        if thumbnail_store is not None:
+            self._thumbnail_thread = threading.Thread(target=self._write_thumbnails, name='ThumbnailWriter',
+                                                      daemon=True)
+            self._thumbnail_thread.start()
+
+    def update(self, image_files, index, fit_size):
+        """根据当前图片列表与索引重新计算预读窗口，丢弃窗口外的图片并排队解码缺失的图片"""
+        wanted = []
+        if 0 <= index < len(image_files):
+            wanted.append(image_files[index])
+        for offset in range(1, self.window + 1):
+            for i in (index + offset, index - offset):
+                if 0 <= i < len(image_files):
+                    wanted.append(image_files[i])
+
+        with self._condition:
+            if fit_size != self._fit_size:
+                self._clear()
+                self._fit_size = fit_size
+            self._wanted = set(wanted)
+            for image_path in list(self._images):
+                if image_path not in self._wanted:
+                    self._discard(image_path)
+            self._queue = [image_path for image_path in wanted if image_path not in self._images]
+            self._condition.notify_all()  # 预读线程与缩略图写入线程共用该条件变量
+
+    def get(self, image_path):
+        """取出已预读的图片，未命中返回 None"""
+        with self._condition:
+            return self._images.get(image_path)
+
+    def invalidate(self):
+        """清空全部预读结果（如重新打开文件夹时）"""
+        with self._condition:
+            self._clear()
+            self._wanted = set()
+            self._queue = []
+            self._condition.notify_all()
+
+    def stop(self):
+        """停止工作线程"""
+        with self._condition:
+            self._stopped = True
+            self._clear()
+            self._pending_thumbnails.clear()
+            self._condition.notify_all()
+        self._thread.join(timeout=1)
+        if self._thumbnail_thread is not None:
+            self._thumbnail_thread.join(timeout=1)
+
+    def _clear(self):
+        self._images.clear()
+        self._bytes = 0
+        self._generation += 1
+
+    def _discard(self, image_path):
+        decoded = self._images.pop(image_path)
+        self._bytes -= decoded.image.sizeInBytes()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                image_path = self._queue.pop(0)
+                fit_size = self._fit_size
+                generation = self._generation
+
+            decoded = self.image_loader.decode(image_path, fit_size)
+
+            with self._condition:
+                if self.thumbnail_store is not None and not decoded.image.isNull():
+                    self._pending_thumbnails.pop(image_path, None)
+                    self._pending_thumbnails[image_path] = decoded.image
+                    if len(self._pending_thumbnails) > self.THUMBNAIL_QUEUE_LIMIT:
+                        self._pending_thumbnails.popitem(last=False)
+                    self._condition.notify_all()
+                if generation != self._generation or image_path not in self._wanted:
+                    continue
+                size = decoded.image.sizeInBytes()
+                if self._bytes + size > self.memory_budget:
+                    # 超出内存预算，剩余（优先级更低的）图片不再预读
+                    self._queue = []
+                    continue
+                self._images[image_path] = decoded
+                self._bytes += size
+            self.image_ready.emit(image_path)
+
+    def _write_thumbnails(self):
+        """缩略图写入线程：预读线程空闲时才编码写入，不与当前窗口的解码争抢"""
+        while True:
+            with self._condition:
+                while not self._stopped and (not self._pending_thumbnails or self._queue):
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                image_path, image = self._pending_thumbnails.popitem(last=False)
+            try:
+                self.thumbnail_store.save(image_path, image)
+            except OSError:
+                pass
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: scan_index.py
+last update： 2026.10.18
+"""
+
+import os
+import sqlite3
+from collections import defaultdict
+
+from image_order import natural_key
+from image_types import ImageTypeDetector
+
+
+class ScanIndex:
+    """
+    文件夹扫描索引，按根目录将图片的相对路径、文件大小与 mtime 持久化到 SQLite，
+    再次打开同一文件夹时只重新列举 mtime 发生变化的目录；
+    detector 为 ImageTypeDetector（默认按 settings/image_formats.json 配置），检测规则变化时索引整体失效
+    """
+
+    def __init__(self, db_path=r'settings/scan_index.db', detector=None):
+        self.db_path = db_path
+        self.detector = detector if detector is not None else ImageTypeDetector.from_settings()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS dirs ('
+                     'root TEXT, rel_dir TEXT, parent TEXT, mtime_ns INTEGER, PRIMARY KEY (root, rel_dir))')
+        conn.execute('CREATE TABLE IF NOT EXISTS files ('
+                     'root TEXT, rel_dir TEXT, name TEXT, size INTEGER, mtime_ns INTEGER)')
+        conn.execute('CREATE INDEX IF NOT EXISTS files_dir ON files (root, rel_dir)')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        row = conn.execute("SELECT value FROM meta WHERE name = 'detector'").fetchone()
+        if row is None or row[0] != self.detector.key:
+            # 索引中只记录了按旧规则判定为图片的文件，规则变化后全部重新列举
+            with conn:
+                conn.execute('DELETE FROM dirs')
+                conn.execute('DELETE FROM files')
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('detector', ?)", (self.detector.key,))
+        return conn
+
+    def iter_image_entries(self, dir_path, restat=False):
+        """
+        逐个产出文件夹（含子文件夹）下图片的 (路径, 文件大小, mtime)，按文件夹深度优先、子文件夹按自然顺序遍历，
+        同一文件夹的图片连续产出；目录未变化时直接取用索引中的记录。
+        原地修改的文件不会改变目录的 mtime，索引中的大小与 mtime 可能过期，
+        restat 为 True 时对取自索引的文件重新 stat（按大小/修改时间排序时需要），有变化的目录一并写回索引。
+        完整遍历结束后才写回索引，中途取消不会留下不完整的记录
+        """
+        root = os.path.abspath(dir_path)
+        conn = self._connect()
+        try:
+            known_mtimes = {}  # 相对目录 -> mtime
+            children = defaultdict(list)  # 相对目录 -> 子目录列表
+            for rel_dir, parent, mtime_ns in conn.execute(
+                    'SELECT rel_dir, parent, mtime_ns FROM dirs WHERE root = ?', (root,)):
+                known_mtimes[rel_dir] = mtime_ns
+                if parent is not None:
+                    children[parent].append(rel_dir)
+
+            visited = set()
+            changed = {}  # 相对目录 -> (mtime, [(文件名, 大小, mtime)], [子目录])
+            pending_dirs = ['']
+            while pending_dirs:
+                rel_dir = pending_dirs.pop()
+                current_dir = os.path.join(root, rel_dir) if rel_dir else root
+                try:
+                    mtime_ns = os.stat(current_dir).st_mtime_ns
+                except OSError:
+                    continue
+                visited.add(rel_dir)
+
+                if known_mtimes.get(rel_dir) == mtime_ns:
+                    # 按目录读取索引记录，首批图片无需等待整个索引加载
+                    files = conn.execute('SELECT name, size, mtime_ns FROM files WHERE root = ? AND rel_dir = ? '
+                                         'ORDER BY rowid', (root, rel_dir)).fetchall()
+                    sub_dirs = sorted(children[rel_dir], key=natural_key)
+                    if restat:
+                        fresh_files = self._restat(current_dir, files)
+                        if fresh_files != files:
+                            files = fresh_files
+                            changed[rel_dir] = (mtime_ns, files, sub_dirs)
+                else:
+                    files, sub_names = self.detector.scan_dir(current_dir)
+                    sub_dirs = sorted((os.path.join(rel_dir, name) if rel_dir else name for name in sub_names),
+                                      key=natural_key)
+                    changed[rel_dir] = (mtime_ns, files, sub_dirs)
+
+                for name, size, file_mtime in files:
+                    yield os.path.join(current_dir, name), size, file_mtime
+                pending_dirs.extend(reversed(sub_dirs))
+
+            self._save(conn, root, changed, set(known_mtimes) - visited)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _restat(current_dir, files):
+        """重新读取索引记录中各文件的大小与 mtime，已不存在的文件去掉"""
+        fresh_files = []
+        for name, _, _ in files:
+            try:
+                stat = os.stat(os.path.join(current_dir, name))
+            except OSError:
+                continue
+            fresh_files.append((name, stat.st_size, stat.st_mtime_ns))
+        return fresh_files
+
+    @staticmethod
+    def _save(conn, root, changed, removed_dirs):
+        if not changed and not removed_dirs:
+            return
+        with conn:
+            for rel_dir in set(changed) | removed_dirs:
+                conn.execute('DELETE FROM dirs WHERE root = ? AND rel_dir = ?', (root, rel_dir))
+                conn.execute('DELETE FROM files WHERE root = ? AND rel_dir = ?', (root, rel_dir))
+            for rel_dir, (mtime_ns, files, _) in changed.items():
+                parent = os.path.dirname(rel_dir) if rel_dir else None
+                conn.execute('INSERT INTO dirs VALUES (?, ?, ?, ?)', (root, rel_dir, parent, mtime_ns))
+                conn.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?)',
+                                 [(root, rel_dir, name, size, file_mtime) for name, size, file_mtime in files])
@@ -4,21 +4,38 @@ Project Name: data_clean
 File Created: 2024.11.18
 Author: ZhangYuetao
 File Name: server_connect.py
-Update: 2024.11.18
+Update: 2026.10.18
 """
 
+import errno
+import hashlib
+import json
 import os
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-import toml
 import shutil
 
-import smbclient
+# toml 与 smbclient 仅在首次使用时导入，不拖慢软件启动
+from utils import read_json, write_json
+
+SHARE_DIR = r"数据相关软件/数据处理软件"  # 软件发布目录（相对共享根目录）
+MANIFEST_NAME = 'update_manifest.json'  # 发布目录中的文件清单（各文件大小与 SHA-256）
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 分块下载的块大小（字节）
+DOWNLOAD_WORKERS = 4  # 并发下载的线程数
+VERSION_CACHE_PATH = r'settings/version_cache.json'  # 服务器版本号的本地缓存
+CONNECTION_ERRNOS = {errno.ECONNRESET, errno.ECONNABORTED, errno.ECONNREFUSED, errno.EPIPE, errno.ETIMEDOUT,
+                     errno.ENOTCONN, errno.ENETDOWN, errno.ENETUNREACH, errno.EHOSTUNREACH}  # 需要重新连接的错误码
+VERSION_CACHE_TTL = 300  # 版本号缓存有效期（秒），期内不访问服务器
 
 
 def load_credentials(config_path=r"settings/.secret.toml"):
+    import toml
+
     with open(config_path, 'r') as config_file:
         config = toml.load(config_file)
         credentials = config.get("credentials", {})
@@ -30,11 +47,15 @@ def load_credentials(config_path=r"settings/.secret.toml"):
         )
 
 
+@lru_cache(maxsize=None)
 def get_current_software_version(current_software_path):
+    """读取本地版本号，每个进程只解析一次"""
     file_dir = os.path.dirname(current_software_path)
     file_path = os.path.join(file_dir, 'settings', 'software_infos.toml')
 
     try:
+        import toml
+
         with open(file_path, mode='r') as f:
             file_content = f.read()  # 读取文件内容
 
@@ -48,154 +69,412 @@ def get_current_software_version(current_software_path):
         return '未知'
 
 
-def get_update_log(software_name):
-    # 从 .secret.toml 中加载配置信息
-    server_ip, share_name, username, password = load_credentials()
-
-    # 注册会话
-    smbclient.register_session(server_ip, username=username, password=password)
-
-    # 构建共享路径
-    share_path = f"\\\\{server_ip}\\{share_name}"
-
-    share_dir = r"数据相关软件/数据处理软件"
-    file_dir = os.path.join(share_path, share_dir)
-
-    # 读取文件内容
-    try:
-        txt_path = None
-        files = smbclient.listdir(file_dir)
-        for dir_name in files:
+class LocalShareBackend:
+    """
+    以本地文件夹模拟共享目录的后端，接口与 smbclient 中用到的部分一致，
+    用于在没有服务器时调试更新流程（设置环境变量 DATA_CLEAN_LOCAL_SHARE 为本地文件夹即可启用）
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def _local_path(self, path):
+        # \\server\share\a/b -> root_dir/a/b
+        parts = [part for part in path.replace('\\', '/').split('/') if part]
+        return os.path.join(self.root_dir, *parts[2:])
+
+    def register_session(self, server, username=None, password=None, **kwargs):
+        pass
+
+    def delete_session(self, server, **kwargs):
+        pass
+
+    def listdir(self, path):
+        return os.listdir(self._local_path(path))
+
+    def stat(self, path):
+        return os.stat(self._local_path(path))
+
+    def open_file(self, path, mode='r', **kwargs):
+        return open(self._local_path(path), mode, **kwargs)
+
+    def walk(self, top):
+        local_top = self._local_path(top)
+        for root, dirs, files in os.walk(local_top):
+            rel_dir = os.path.relpath(root, local_top)
+            yield (top if rel_dir == '.' else os.path.join(top, rel_dir)), dirs, files
+
+
+class SMBSession:
+    """
+    服务器会话管理：凭据只读取一次，多次请求（含并发下载）复用同一会话，连接断开时重新连接并重试一次；
+    解析到的软件目录缓存 dir_ttl 秒，避免每次请求都重新列出发布目录
+    """
+
+    def __init__(self, config_path=r"settings/.secret.toml", backend=None, dir_ttl=300):
+        if backend is None:
+            import smbclient
+            backend = smbclient
+        self.config_path = config_path
+        self.backend = backend  # smbclient 或 LocalShareBackend 等同接口的后端
+        self.dir_ttl = dir_ttl  # 软件目录缓存时间（秒）
+        self._lock = threading.Lock()
+        self._credentials = None  # (server_ip, share_name, username, password)
+        self._connected = False
+        self._generation = 0  # 每次断开会话时递增，并发请求据此判断会话是否已被其他线程重新连接
+        self._software_dirs = {}  # 软件名 -> (目录路径, 过期时间)
+
+    @property
+    def credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = load_credentials(self.config_path)
+            return self._credentials
+
+    @property
+    def share_path(self):
+        server_ip, share_name, _, _ = self.credentials
+        return f"\\\\{server_ip}\\{share_name}"
+
+    def connect(self):
+        """确保会话已连接，返回当前会话的代数"""
+        server_ip, _, username, password = self.credentials
+        with self._lock:
+            if not self._connected:
+                self.backend.register_session(server_ip, username=username, password=password)
+                self._connected = True
+            return self._generation
+
+    def reset(self, generation=None):
+        """
+        断开会话并清空目录缓存，下次请求时重新连接；
+        给出 generation 且会话已不是该代（其他线程已重新连接）时不做任何事，避免断开正在使用的新会话
+        """
+        server_ip = self.credentials[0]
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._generation += 1
+            if self._connected:
+                try:
+                    self.backend.delete_session(server_ip)
+                except Exception:
+                    pass
+                self._connected = False
+            self._software_dirs.clear()
+
+    def run(self, func):
+        """
+        在已连接的会话中执行 func(backend)，连接断开时重新连接后重试一次；
+        其他异常（文件不存在、校验失败等）直接抛出，不影响其他线程共用的会话
+        """
+        generation = self.connect()
+        try:
+            return func(self.backend)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            # 多个线程同时发现连接断开时只有第一个断开重连，其余直接在新会话上重试
+            self.reset(generation)
+            self.connect()
+            return func(self.backend)
+
+    def find_software_dir(self, software_name):
+        """查找发布目录下对应软件（非 linux 版本）的文件夹，结果缓存 dir_ttl 秒"""
+        with self._lock:
+            cached = self._software_dirs.get(software_name)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        file_dir = os.path.join(self.share_path, SHARE_DIR)
+        software_dir = None
+        for dir_name in self.run(lambda backend: backend.listdir(file_dir)):
             if software_name in dir_name and 'linux' not in dir_name:
                 software_dir = os.path.join(file_dir, dir_name)
-                txt_path = os.path.join(software_dir, 'update_log.txt')
                 break
+        if software_dir is None:
+            raise FileNotFoundError("未找到对应软件")
 
-        if not txt_path:
-            raise FileNotFoundError("未找到txt对应文件")
+        with self._lock:
+            self._software_dirs[software_name] = (software_dir, time.monotonic() + self.dir_ttl)
+        return software_dir
 
-        with smbclient.open_file(txt_path, mode='r', encoding='utf-8') as file:
-            txt_content = file.read()
+    def read_text(self, path, encoding=None):
+        def read(backend):
+            with backend.open_file(path, mode='r', encoding=encoding) as file:
+                return file.read()
+        return self.run(read)
 
-        return txt_content
 
-    except Exception as e:
-        raise ValueError(f"读取文件出错: {e}")
+def is_connection_error(error):
+    """是否为连接层面的错误（连接断开、超时、会话失效），只有这类错误需要重新连接"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, OSError) and error.errno in CONNECTION_ERRNOS:
+        return True
+    try:
+        from smbprotocol.exceptions import IOTimeout, SMBConnectionClosed, UserSessionDeleted
+    except ImportError:
+        return False
+    return isinstance(error, (IOTimeout, SMBConnectionClosed, UserSessionDeleted))
 
 
-def get_new_software_version(software_name):
-    # 从 .secret.toml 中加载配置信息
-    server_ip, share_name, username, password = load_credentials()
+def is_not_found(error):
+    """是否为文件不存在（smbclient 抛出的 SMBOSError 不是 FileNotFoundError，需比较 errno）"""
+    return isinstance(error, OSError) and error.errno == errno.ENOENT
 
-    # 注册会话
-    smbclient.register_session(server_ip, username=username, password=password)
 
-    # 构建共享路径
-    share_path = f"\\\\{server_ip}\\{share_name}"
+_session = None
+_session_lock = threading.Lock()
 
-    share_dir = r"数据相关软件/数据处理软件"
-    file_dir = os.path.join(share_path, share_dir)
 
-    # 读取文件内容
-    try:
-        toml_path = None
-        files = smbclient.listdir(file_dir)
-        for dir_name in files:
-            if software_name in dir_name and 'linux' not in dir_name:
-                software_dir = os.path.join(file_dir, dir_name)
-                toml_path = os.path.join(software_dir, 'settings', 'software_infos.toml')
-                break
+def get_session():
+    """返回进程内共享的服务器会话"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            local_share = os.environ.get('DATA_CLEAN_LOCAL_SHARE')
+            _session = SMBSession(backend=LocalShareBackend(local_share) if local_share else None)
+        return _session
 
-        if not toml_path:
-            raise FileNotFoundError("未找到对应文件")
 
-        with smbclient.open_file(toml_path, mode='r') as file:
-            toml_content = file.read()
+def get_update_log(software_name):
+    session = get_session()
 
-        # 解析 TOML 文件
-        toml_data = toml.loads(toml_content)
+    # 读取文件内容
+    try:
+        txt_path = os.path.join(session.find_software_dir(software_name), 'update_log.txt')
+        return session.read_text(txt_path, encoding='utf-8')
 
-        # 提取 version 信息
-        version = toml_data.get("version", "未找到 version 信息")
-        return version
     except Exception as e:
         raise ValueError(f"读取文件出错: {e}")
 
 
-def update_software(software_dir, software_name):
-    server_ip, share_name, username, password = load_credentials()
+_version_cache_lock = threading.Lock()
 
-    # 注册会话
-    smbclient.register_session(server_ip, username=username, password=password)
 
-    # 构建共享路径
-    share_path = f"\\\\{server_ip}\\{share_name}"
+def get_new_software_version(software_name, max_age=VERSION_CACHE_TTL):
+    """
+    获取服务器上的最新版本号，结果缓存在 VERSION_CACHE_PATH：max_age 秒内直接返回缓存；
+    过期后只查询远程 software_infos.toml 的大小与修改时间，未变化则沿用缓存，变化时才下载解析
+    """
+    with _version_cache_lock:
+        entry = read_json(VERSION_CACHE_PATH, {}).get(software_name)
+    if entry and 0 <= time.time() - entry['checked_at'] < max_age:
+        return entry['version']
 
-    share_dir = r"数据相关软件/数据处理软件"
-    file_dir = os.path.join(share_path, share_dir)
+    session = get_session()
 
     # 读取文件内容
     try:
-        files = smbclient.listdir(file_dir)
-        update_software_dir = None
-        for dir_name in files:
-            if software_name in dir_name and 'linux' not in dir_name:
-                update_software_dir = os.path.join(file_dir, dir_name)
-                break
+        toml_path = os.path.join(session.find_software_dir(software_name), 'settings', 'software_infos.toml')
+        stat = session.run(lambda backend: backend.stat(toml_path))
+        validator = [stat.st_size, stat.st_mtime]
+        if entry and entry.get('validator') == validator:
+            version = entry['version']
+        else:
+            toml_content = session.read_text(toml_path)
 
-        if not update_software_dir:
-            raise FileNotFoundError("未找到对应软件")
+            import toml
 
-        new_software_path = None
-
-        for root, dirs, files in smbclient.walk(update_software_dir):
-            files = [f for f in files if not f.startswith('.')]  # 排除隐藏文件
-            for file in files:
-                if file.endswith('.exe'):
-                    new_software_path = os.path.join(root, file)
-                    temp_dir = os.path.join(software_dir, 'temp')
-                    os.makedirs(temp_dir, exist_ok=True)
-                    shutil.copy2(new_software_path, temp_dir)
-                    new_software_path = os.path.join(temp_dir, file)
-                else:
-                    src_file = os.path.join(root, file)
-                    dst_file = os.path.join(software_dir, os.path.relpath(src_file, update_software_dir))
-                    os.makedirs(os.path.dirname(dst_file), exist_ok=True)
-                    shutil.copy2(src_file, dst_file)
-
-        if new_software_path and is_file_complete(new_software_path):
-            subprocess.Popen(new_software_path)
-            time.sleep(1)
-            sys.exit("程序已退出")
+            # 解析 TOML 文件
+            toml_data = toml.loads(toml_content)
 
+            # 提取 version 信息
+            version = toml_data.get("version", "未找到 version 信息")
     except Exception as e:
         raise ValueError(f"读取文件出错: {e}")
 
-
-def is_file_complete(file_path, timeout=60):
-    """检查文件是否完全复制完成"""
-    if not os.path.exists(file_path):
+    with _version_cache_lock:
+        cache = read_json(VERSION_CACHE_PATH, {})
+        cache[software_name] = {'version': version, 'validator': validator, 'checked_at': time.time()}
+        try:
+            write_json(VERSION_CACHE_PATH, cache)
+        except OSError:
+            pass
+    return version
+
+
+def _copy_remote_file(backend, src_file, dst_file):
+    """先写入 dst_file.part，写完并落盘后再改名，目标文件存在即表示复制完成"""
+    part_path = f'{dst_file}.part'
+    with backend.open_file(src_file, mode='rb') as src, open(part_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(part_path, dst_file)
+
+
+def copy_file_atomic(src_file, dst_file):
+    """本地文件的先写临时文件再改名复制"""
+    part_path = f'{dst_file}.part'
+    shutil.copy2(src_file, part_path)
+    os.replace(part_path, dst_file)
+
+
+def retry_until_released(func, path, timeout=10, interval=0.05):
+    """
+    对 path 执行 func（如删除），文件仍被正在退出的进程占用时短间隔重试，
+    占用解除后立即完成；超过 timeout 秒仍失败则抛出最后一次的异常
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return func(path)
+        except PermissionError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(interval)
+
+
+def file_sha256(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def build_manifest(release_dir):
+    """
+    生成发布目录的文件清单并写入 MANIFEST_NAME（发布新版本时在发布目录上运行），
+    格式为 {"files": {"相对路径（/ 分隔）": {"size": 字节数, "sha256": 哈希}}}
+    """
+    files = {}
+    for root, dirs, names in os.walk(release_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in names:
+            if name.startswith('.') or name == MANIFEST_NAME:
+                continue
+            file_path = os.path.join(root, name)
+            rel_path = os.path.relpath(file_path, release_dir).replace(os.sep, '/')
+            files[rel_path] = {'size': os.path.getsize(file_path), 'sha256': file_sha256(file_path)}
+    manifest = {'files': files}
+    with open(os.path.join(release_dir, MANIFEST_NAME), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def _is_up_to_date(local_path, info):
+    """本地文件是否与清单一致：先比较大小，大小相同再比较哈希"""
+    try:
+        if os.path.getsize(local_path) != info['size']:
+            return False
+    except OSError:
         return False
+    return file_sha256(local_path) == info['sha256']
+
+
+def _download_file(backend, src_file, dst_file, info):
+    """
+    分块下载到 dst_file.part，已有的 .part 从断点处续传；
+    下载完成后校验大小与哈希，通过后替换为 dst_file，校验失败删除 .part 并抛出异常
+    """
+    part_path = f'{dst_file}.part'
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset > info['size']:
+        os.remove(part_path)
+        offset = 0
+    if offset < info['size']:
+        with backend.open_file(src_file, mode='rb') as src, open(part_path, 'ab') as dst:
+            src.seek(offset)
+            for chunk in iter(lambda: src.read(DOWNLOAD_CHUNK_SIZE), b''):
+                dst.write(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+    if os.path.getsize(part_path) != info['size'] or file_sha256(part_path) != info['sha256']:
+        os.remove(part_path)
+        raise ValueError(f"文件校验失败: {src_file}")
+    os.replace(part_path, dst_file)
+
+
+def _load_manifest(session, update_software_dir):
+    """读取服务器上的文件清单，服务器未提供清单时返回 None"""
+    manifest_path = os.path.join(update_software_dir, MANIFEST_NAME)
+    try:
+        return json.loads(session.read_text(manifest_path, encoding='utf-8'))
+    except OSError as e:
+        if is_not_found(e):
+            return None
+        raise
+
+
+def _update_by_manifest(session, manifest, update_software_dir, software_dir):
+    """只下载与本地不一致的文件，多线程并发；返回需要重启的新程序路径（程序本身未变化时为 None）"""
+    temp_dir = os.path.join(software_dir, 'temp')
+    new_software_path = None
+    downloads = []  # [(远程路径, 本地目标路径, 清单信息)]
+    for rel_path, info in manifest['files'].items():
+        parts = rel_path.split('/')
+        if parts[-1].startswith('.'):
+            continue  # 排除隐藏文件
+        local_path = os.path.join(software_dir, *parts)
+        if _is_up_to_date(local_path, info):
+            continue
+        src_file = os.path.join(update_software_dir, *parts)
+        if rel_path.endswith('.exe'):
+            # 正在运行的程序不能直接覆盖，下载到 temp 中由新程序完成替换
+            local_path = os.path.join(temp_dir, parts[-1])
+            new_software_path = local_path
+        downloads.append((src_file, local_path, info))
+
+    for _, local_path, _ in downloads:
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+    def download(item):
+        src_file, local_path, info = item
+        try:
+            session.run(lambda backend: _download_file(backend, src_file, local_path, info))
+        except ValueError:
+            # 校验失败（如续传的 .part 已损坏）时 .part 已被删除，重新完整下载一次；会话本身无需重连
+            session.run(lambda backend: _download_file(backend, src_file, local_path, info))
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='Download') as executor:
+        # list() 使任一文件失败时在此抛出异常，已下载的 .part 留待下次续传
+        list(executor.map(download, downloads))
+    return new_software_path
+
+
+def _update_by_copy(session, update_software_dir, software_dir):
+    """服务器未提供清单时的全量复制，返回新程序路径"""
+    new_software_path = None
+
+    for root, dirs, files in session.run(lambda backend: list(backend.walk(update_software_dir))):
+        files = [f for f in files if not f.startswith('.')]  # 排除隐藏文件
+        for file in files:
+            src_file = os.path.join(root, file)
+            if file.endswith('.exe'):
+                temp_dir = os.path.join(software_dir, 'temp')
+                os.makedirs(temp_dir, exist_ok=True)
+                new_software_path = os.path.join(temp_dir, file)
+                session.run(lambda backend: _copy_remote_file(backend, src_file, new_software_path))
+            else:
+                dst_file = os.path.join(software_dir, os.path.relpath(src_file, update_software_dir))
+                os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+                session.run(lambda backend: _copy_remote_file(backend, src_file, dst_file))
+    return new_software_path
 
-    initial_size = os.path.getsize(file_path)
-    time.sleep(1)  # 等待1秒钟，给文件写入一些时间
-    final_size = os.path.getsize(file_path)
 
-    # 如果文件大小没有变化，认为文件已复制完成
-    if initial_size == final_size:
-        return True
+def update_software(software_dir, software_name):
+    session = get_session()
+
+    # 读取文件内容
+    try:
+        update_software_dir = session.find_software_dir(software_name)
+
+        manifest = _load_manifest(session, update_software_dir)
+        if manifest is not None:
+            new_software_path = _update_by_manifest(session, manifest, update_software_dir, software_dir)
+        else:
+            new_software_path = _update_by_copy(session, update_software_dir, software_dir)
+
+        if new_software_path:
+            # 下载/复制均为校验或改名后才生成目标文件，此处文件已完整，可直接启动
+            subprocess.Popen(new_software_path)
+            sys.exit("程序已退出")
 
-    # 如果文件大小仍在变化，则继续等待
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        time.sleep(1)
-        new_size = os.path.getsize(file_path)
-        if new_size == final_size:
-            return True
-        final_size = new_size
-
-    # 超过最大等待时间后认为文件未复制完成
-    return False
+    except Exception as e:
+        raise ValueError(f"读取文件出错: {e}")
 
 
 def check_version(current_version):
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: session_journal.py
+last update： 2026.10.18
+"""
+
+import json
+import os
+
+
+class SessionState:
+    """由日志回放得到的清洗进度"""
+
+    def __init__(self, dir_path=None):
+        self.dir_path = dir_path  # 图片文件夹路径
+        self.save_path = None  # 保存路径
+        self.undo_stack = []  # 每个元素为一次操作的 [(源路径, 目标路径, 原队列中的下一张图片)]
+        self.current = None  # 当前显示的图片路径
+        self.sort_mode = None  # 排序方式，None 为默认
+        self.shard = None  # (分片序号, 分片数)，None 表示不分片
+
+    def remove_failed(self, sources):
+        """从包含这些源路径的最近一次操作中去掉移动失败的图片，与 CleanEngine.restore_failed 保持一致"""
+        sources = set(sources)
+        for i in range(len(self.undo_stack) - 1, -1, -1):
+            moves = self.undo_stack[i]
+            if any(move[0] in sources for move in moves):
+                kept = [move for move in moves if move[0] not in sources]
+                if kept:
+                    self.undo_stack[i] = kept
+                else:
+                    del self.undo_stack[i]
+                return
+
+
+class SessionJournal:
+    """
+    清洗过程的追加式日志（JSONL）：每次分类/撤回只追加一行到缓冲区，
+    每 sync_every 条或定时调用 sync() 时统一 fsync；日志过长时压缩为当前状态。
+    压缩时只保留最近 max_undo 次操作的撤回记录，下次压缩的阈值不低于压缩后记录数的两倍，
+    保证压缩的开销均摊到每条记录上为常数
+    """
+
+    def __init__(self, journal_path=r'settings/session_journal.jsonl', sync_every=20, compact_records=20000,
+                 max_undo=5000):
+        self.journal_path = journal_path
+        self.sync_every = sync_every  # 累计多少条记录后 fsync
+        self.compact_records = compact_records  # 记录数超过该值时压缩
+        self.max_undo = max_undo  # 重写日志时最多保留的撤回记录数（更早的操作在恢复会话后不可撤回）
+        self._file = None
+        self._unsynced = 0  # 尚未 fsync 的记录数
+        self._record_count = 0  # 当前日志中的记录数
+        self._compact_at = compact_records  # 记录数超过该值时压缩
+
+    def load(self):
+        """回放日志，返回 SessionState；无日志或无有效会话时返回 None"""
+        if not os.path.exists(self.journal_path):
+            return None
+        state = None
+        with open(self.journal_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # 崩溃时写了一半的最后一行
+                op = record.get('op')
+                if op == 'open':
+                    state = SessionState(record['dir_path'])
+                    state.sort_mode = record.get('sort_mode')
+                    state.shard = tuple(record['shard']) if record.get('shard') else None
+                elif state is None:
+                    continue
+                elif op == 'save_path':
+                    state.save_path = record['save_path']
+                elif op == 'move':
+                    state.undo_stack.append([tuple(move) for move in record['moves']])
+                elif op == 'undo' and state.undo_stack:
+                    state.undo_stack.pop()
+                elif op == 'failed':
+                    state.remove_failed(record['sources'])
+                if state is not None and 'current' in record:
+                    state.current = record['current']
+        return state
+
+    def start(self, dir_path, sort_mode=None, shard=None):
+        """开始新的会话，清空旧日志"""
+        state = SessionState(dir_path)
+        state.sort_mode = sort_mode
+        state.shard = shard
+        self.rewrite(state)
+
+    def rewrite(self, state):
+        """以 state 为内容原子重写日志（用于新会话、恢复与压缩）"""
+        self.close()
+        records = [{'op': 'open', 'dir_path': state.dir_path}]
+        if state.sort_mode:
+            records[0]['sort_mode'] = state.sort_mode
+        if state.shard:
+            records[0]['shard'] = list(state.shard)
+        if state.save_path:
+            records.append({'op': 'save_path', 'save_path': state.save_path})
+        records.extend({'op': 'move', 'moves': moves} for moves in state.undo_stack[-self.max_undo:])
+        if state.current:
+            records.append({'op': 'pos', 'current': state.current})
+        temp_path = f'{self.journal_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.journal_path)
+        self._record_count = len(records)
+        self._compact_at = max(self.compact_records, 2 * len(records))
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def record(self, op, **fields):
+        """追加一条记录（仅写入缓冲区）"""
+        if self._file is None:
+            return
+        fields['op'] = op
+        self._file.write(json.dumps(fields, ensure_ascii=False) + '\n')
+        self._unsynced += 1
+        self._record_count += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """将缓冲区写入磁盘，日志过长时压缩"""
+        if self._file is None or self._unsynced == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        if self._record_count > self._compact_at:
+            self.rewrite(self.load())
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
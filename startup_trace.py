@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: startup_trace.py
+last update： 2026.10.18
+"""
+
+import time
+
+
+class StartupTrace:
+    """启动耗时追踪：按阶段记录时间点，首次绘制后输出各阶段耗时"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()  # 计时起点（本模块首次导入时）
+        self.marks = []  # [(阶段名, 时间点)]
+        self.finished = False
+
+    def mark(self, phase):
+        if not self.finished:
+            self.marks.append((phase, time.perf_counter()))
+
+    def report(self):
+        """返回各阶段耗时与累计耗时的文本"""
+        lines = []
+        last_time = self.start_time
+        for phase, mark_time in self.marks:
+            lines.append(f'{phase}: +{(mark_time - last_time) * 1000:.1f} ms '
+                         f'(累计 {(mark_time - self.start_time) * 1000:.1f} ms)')
+            last_time = mark_time
+        return '\n'.join(lines)
+
+    def total_ms(self):
+        if not self.marks:
+            return 0.0
+        return (self.marks[-1][1] - self.start_time) * 1000
+
+    def finish(self, report_path=None):
+        """结束追踪，可选地将报告写入文件"""
+        if self.finished:
+            return
+        self.finished = True
+        if report_path:
+            try:
+                with open(report_path, 'w', encoding='utf-8') as file:
+                    file.write(self.report() + '\n')
+            except OSError:
+                pass
+
+
+startup_trace = StartupTrace()  # 全局启动追踪，需在其他模块之前导入
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: stylesheet.py
+last update： 2026.10.18
+"""
+
+import importlib.metadata
+import importlib.util
+import json
+import os
+
+from PyQt5.QtCore import QDir
+from PyQt5.QtGui import QColor, QFontDatabase, QGuiApplication, QPalette
+
+
+STYLESHEET_CACHE_PATH = r'settings/stylesheet_cache.qss'  # 渲染后的样式表缓存
+ICONS_DIR = os.path.join(os.path.expanduser('~'), '.qt_material', 'theme')  # qt_material 生成的图标目录
+
+
+def _qt_material_dir():
+    """qt_material 的安装目录（只查找，不导入）"""
+    spec = importlib.util.find_spec('qt_material')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return list(spec.submodule_search_locations)[0]
+
+
+def _cache_key(package_dir, theme):
+    """缓存标识：qt_material 版本号（读取安装信息，不导入）、安装目录与主题；无法取得版本号时返回 None（不使用缓存）"""
+    try:
+        version = importlib.metadata.version('qt-material')
+    except importlib.metadata.PackageNotFoundError:
+        return None
+    return {'theme': theme, 'package_dir': package_dir, 'version': version}
+
+
+def _read_cache(cache_path):
+    """返回 (缓存信息, 样式表)，缓存不存在或损坏时返回 (None, None)"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            header = file.readline()
+            stylesheet = file.read()
+        return json.loads(header[len('/* '):-len(' */\n')]), stylesheet
+    except (OSError, ValueError):
+        return None, None
+
+
+def _apply_cached(app, info, stylesheet):
+    """
+    复现 qt_material 2.x 的 apply_stylesheet 对应用的设置：风格、字体、调色板、图标搜索路径与样式表；
+    依赖其内部实现，缓存按版本号失效
+    """
+    app.setStyle('Fusion')
+    if not info['gui']:
+        # qt_material 未识别出当前 Qt 绑定时只设置了样式表
+        app.setStyleSheet(stylesheet)
+        return
+    fonts_dir = os.path.join(info['package_dir'], 'fonts', 'roboto')
+    for font in os.listdir(fonts_dir):
+        if font.endswith('.ttf'):
+            QFontDatabase.addApplicationFont(os.path.join(fonts_dir, font))
+    palette = QGuiApplication.palette()
+    primary_color = info['primary_color']
+    palette.setColor(QPalette.Text, QColor(*[int(primary_color[i:i + 2], 16) for i in range(1, 6, 2)] + [92]))
+    QGuiApplication.setPalette(palette)
+    QDir.addSearchPath('icon', ICONS_DIR)
+    QDir.addSearchPath('qt_material', os.path.join(info['package_dir'], 'resources'))
+    app.setStyleSheet(stylesheet)
+
+
+def apply_stylesheet(app, theme='default', cache_path=STYLESHEET_CACHE_PATH):
+    """
+    应用 qt_material 主题。首次渲染后缓存样式表（qt_material 版本号或主题变化时失效），
+    之后启动直接使用缓存，无需导入 qt_material、渲染模板与重新生成图标；
+    使用缓存出现任何错误时退回为 qt_material.apply_stylesheet
+    """
+    package_dir = _qt_material_dir()
+    if package_dir is None:
+        return
+    key = _cache_key(package_dir, theme)
+    info, stylesheet = _read_cache(cache_path) if key is not None else (None, None)
+    if info is not None and all(info.get(k) == v for k, v in key.items()) \
+            and os.path.isdir(os.path.join(ICONS_DIR, 'primary')):
+        try:
+            _apply_cached(app, info, stylesheet)
+            return
+        except Exception:
+            pass  # 缓存的设置与当前 qt_material 不符，重新渲染
+
+    import qt_material
+
+    qt_material.apply_stylesheet(app, theme=theme)
+    if key is None:
+        return
+    key['gui'] = getattr(qt_material, 'GUI', True)
+    key['primary_color'] = os.environ.get('QTMATERIAL_PRIMARYCOLOR')
+    if not key['primary_color']:
+        return
+    try:
+        temp_path = f'{cache_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(f'/* {json.dumps(key)} */\n')
+            file.write(app.styleSheet())
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
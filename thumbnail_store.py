@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: thumbnail_store.py
+last update： 2026.10.18
+"""
+
+import hashlib
+import os
+import threading
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageWriter
+
+
+class ThumbnailStore:
+    """
+    磁盘缩略图库：以 (路径, 文件大小, mtime) 的哈希为键保存若干尺寸的预缩放图，
+    超出容量上限时按最近使用时间淘汰（读取时更新文件 mtime）
+    """
+
+    def __init__(self, root_dir=r'settings/thumbnails', max_bytes=1024 * 1024 * 1024, rendition_sizes=(128, 512)):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes  # 缩略图库容量上限（字节）
+        self.rendition_sizes = tuple(sorted(rendition_sizes))  # 各档缩略图的最长边
+        supported_formats = [bytes(fmt).decode() for fmt in QImageWriter.supportedImageFormats()]
+        self.image_format = 'webp' if 'webp' in supported_formats else 'jpg'
+
+        self._lock = threading.Lock()
+        self._total_bytes = None  # 首次写入时统计
+
+    def _key(self, image_path):
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        text = f'{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}'
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _rendition_path(self, key, size):
+        return os.path.join(self.root_dir, key[:2], f'{key}_{size}.{self.image_format}')
+
+    def load(self, image_path, min_size):
+        """读取最长边不小于 min_size 的最小一档缩略图，没有时退回为已有的最大一档，均无则返回 None"""
+        key = self._key(image_path)
+        if key is None:
+            return None
+        candidates = [size for size in self.rendition_sizes if size >= min_size]
+        candidates += [size for size in reversed(self.rendition_sizes) if size < min_size]
+        for size in candidates:
+            rendition_path = self._rendition_path(key, size)
+            image = QImage(rendition_path)
+            if not image.isNull():
+                try:
+                    os.utime(rendition_path)  # 记录最近使用时间
+                except OSError:
+                    pass
+                return image
+        return None
+
+    def save(self, image_path, image):
+        """由已解码的图片生成各档缩略图并写入（不放大，已存在的跳过）"""
+        key = self._key(image_path)
+        if key is None or image.isNull():
+            return
+        longest_side = max(image.width(), image.height())
+        written_bytes = 0
+        for size in self.rendition_sizes:
+            rendition_path = self._rendition_path(key, size)
+            if size > longest_side or os.path.exists(rendition_path):
+                continue
+            os.makedirs(os.path.dirname(rendition_path), exist_ok=True)
+            rendition = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            # 先写临时文件再替换，避免读到写了一半的缩略图
+            temp_path = f'{rendition_path}.{threading.get_ident()}.tmp'
+            if rendition.save(temp_path, self.image_format, 85):
+                os.replace(temp_path, rendition_path)
+                written_bytes += os.path.getsize(rendition_path)
+        if written_bytes:
+            self._add_bytes(written_bytes)
+
+    def _list_files(self):
+        files = []
+        if not os.path.isdir(self.root_dir):
+            return files
+        for sub_dir in os.scandir(self.root_dir):
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return files
+
+    def _add_bytes(self, nbytes):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._list_files())
+            else:
+                self._total_bytes += nbytes
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """按最近使用时间从旧到新删除，直到占用降到上限的 90%"""
+        files = sorted(self._list_files())
+        self._total_bytes = sum(size for _, size, _ in files)
+        target_bytes = self.max_bytes * 0.9
+        for _, size, path in files:
+            if self._total_bytes <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                continue
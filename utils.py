@@ -4,23 +4,13 @@ Project Name: data_clean
 File Created: 2024.07.22
 Author: ZhangYuetao
 File Name: utils.py
-last update： 2024.08.27
+last update： 2026.10.18
 """
 
 import os
 import json
 
 
-def get_image_files(dir_path):
-    image_files = []
-    image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.img')
-    for root, dirs, files in os.walk(dir_path):
-        for file in files:
-            if file.endswith(image_extensions):
-                image_files.append(os.path.join(root, file))
-    return image_files
-
-
 def read_json(file_path, default_value):
     if os.path.exists(file_path):
         try:
@@ -32,12 +22,38 @@ def read_json(file_path, default_value):
 
 
 def write_json(file_path, data):
-    with open(file_path, 'w', encoding='utf-8') as file:
+    """先写入临时文件再替换，避免写入中断导致 json 文件被截断"""
+    temp_path = f'{file_path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
         json.dump(data, file, ensure_ascii=False, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+
+
+LEGACY_SHIFTED_SYMBOLS = '~!@#$%^&*()_+{}|:"<>?'  # 旧版按 event.text() 匹配、需按住 Shift 输入的符号
+
+
+def normalize_key_name(key_name):
+    """
+    将旧版保存的单字符快捷键转换为现在的组合键名：旧版按输入字符匹配，
+    '!'、'Q' 等需按住 Shift 输入的字符对应现在的 'Shift+!'、'Shift+q'
+    """
+    if len(key_name) != 1:
+        return key_name
+    if 'A' <= key_name <= 'Z':
+        return f'Shift+{key_name.lower()}'
+    if key_name in LEGACY_SHIFTED_SYMBOLS:
+        return f'Shift+{key_name}'
+    return key_name
+
+
+def build_key_index(classes_data):
+    """构建快捷键 -> 分类名的反向索引"""
+    return {class_info["input_keys"]: class_name for class_name, class_info in classes_data.items()
+            if "input_keys" in class_info}
 
 
-def check_key_name(key_name, classes_data):
-    for key in classes_data.keys():
-        if classes_data[key]["input_keys"] == key_name:
-            return False
-    return True
+def check_key_name(key_name, key_index):
+    """快捷键未被占用时返回 True"""
+    return key_name not in key_index
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Project Name: data_clean
+File Created: 2026.10.18
+Author: ZhangYuetao
+File Name: workers.py
+last update： 2026.10.18
+"""
+
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from duplicate_finder import find_duplicates
+from image_order import DEFAULT_SORT_MODE
+from image_validator import validate_images
+
+
+PROGRESS_INTERVAL = 0.2  # 进度信号的最短间隔（秒）
+
+
+def throttled_progress(emit, interval=PROGRESS_INTERVAL):
+    """
+    包装进度回调 emit(已完成, 总数)：距上次调用不足 interval 秒时丢弃，完成时总会调用；
+    避免逐个文件发出信号，大量排队的信号阻塞界面线程
+    """
+    last_emit_time = [0.0]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if done == total or now - last_emit_time[0] >= interval:
+            last_emit_time[0] = now
+            emit(done, total)
+    return progress
+
+
+class ImageScanThread(QThread):
+    """后台扫描文件夹，按排序方式与分片将图片路径分批通过信号推送给界面，支持取消"""
+    files_found = pyqtSignal(list)  # 一批新发现的图片路径
+
+    BATCH_SIZE = 500  # 每批最多路径数
+    BATCH_INTERVAL = 0.2  # 两批之间的最长间隔（秒）
+
+    def __init__(self, dir_path, engine, sort_mode=DEFAULT_SORT_MODE, shard=None, parent=None):
+        super(ImageScanThread, self).__init__(parent)
+        self.dir_path = dir_path
+        self.engine = engine
+        self.sort_mode = sort_mode
+        self.shard = shard  # (分片序号, 分片数)，None 表示不分片
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        batch = []
+        is_first = True
+        last_emit_time = time.monotonic()
+        for image_path in self.engine.iter_image_files(self.dir_path, self.sort_mode, self.shard):
+            if self._cancelled:
+                return
+            batch.append(image_path)
+            # 第一张图片立即推送，使界面尽快显示
+            if is_first or len(batch) >= self.BATCH_SIZE or time.monotonic() - last_emit_time >= self.BATCH_INTERVAL:
+                self.files_found.emit(batch)
+                batch = []
+                is_first = False
+                last_emit_time = time.monotonic()
+        if batch and not self._cancelled:
+            self.files_found.emit(batch)
+
+
+class ThumbnailThread(QThread):
+    """后台解码批量模式下的缩略图"""
+    thumbnail_ready = pyqtSignal(int, QImage)  # 行号, 缩略图
+
+    def __init__(self, image_loader, thumbnail_store, image_paths, thumbnail_size, parent=None):
+        super(ThumbnailThread, self).__init__(parent)
+        self.image_loader = image_loader
+        self.thumbnail_store = thumbnail_store
+        self.image_paths = image_paths
+        self.thumbnail_size = thumbnail_size
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        for row, image_path in enumerate(self.image_paths):
+            if self._cancelled:
+                return
+            # 优先读取磁盘缩略图库，未命中时再解码原图并写回
+            image = self.thumbnail_store.load(image_path, max(self.thumbnail_size.width(),
+                                                              self.thumbnail_size.height()))
+            if image is None:
+                image = self.image_loader.decode(image_path, self.thumbnail_size).image
+                if not image.isNull():
+                    try:
+                        self.thumbnail_store.save(image_path, image)
+                    except OSError:
+                        pass
+            if not image.isNull():
+                self.thumbnail_ready.emit(row, image)
+
+
+class DuplicateScanThread(QThread):
+    """后台查找重复图片（哈希在进程池中计算），完成后推送重复簇"""
+    progress = pyqtSignal(int, int)  # 已计算数量, 需计算总数
+    duplicates_found = pyqtSignal(list)  # 重复簇列表，每簇首张为代表图片
+
+    def __init__(self, image_paths, hash_cache, threshold, parent=None):
+        super(DuplicateScanThread, self).__init__(parent)
+        self.image_paths = image_paths
+        self.hash_cache = hash_cache
+        self.threshold = threshold
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        clusters = find_duplicates(self.image_paths, self.hash_cache, threshold=self.threshold,
+                                   progress=throttled_progress(self.progress.emit),
+                                   is_cancelled=lambda: self._cancelled)
+        if clusters is not None and not self._cancelled:
+            self.duplicates_found.emit(clusters)
+
+
+class ValidationThread(QThread):
+    """后台检查图片是否为空文件、截断或损坏（在进程池中解码），完成后推送有问题的图片"""
+    progress = pyqtSignal(int, int)  # 已检查数量, 总数
+    invalid_found = pyqtSignal(dict)  # {路径: 原因}
+
+    def __init__(self, image_paths, parent=None):
+        super(ValidationThread, self).__init__(parent)
+        self.image_paths = image_paths
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        invalid = validate_images(self.image_paths, progress=throttled_progress(self.progress.emit),
+                                  is_cancelled=lambda: self._cancelled)
+        if invalid is not None and not self._cancelled:
+            self.invalid_found.emit(invalid)
+
+
+class BackgroundTask(QObject):
+    """
+    在守护线程中执行可能阻塞的函数（如连接服务器），结果通过信号回到界面线程；
+    超过 timeout 秒仍未返回时按超时失败处理，之后到达的结果被忽略
+    """
+    task_finished = pyqtSignal(object, object)  # 结果, 异常（成功时为 None）
+    _result_ready = pyqtSignal(object, object)
+
+    def __init__(self, func, *args, timeout=None, parent=None):
+        super(BackgroundTask, self).__init__(parent)
+        self.func = func
+        self.args = args
+        self.timeout = timeout  # 超时时间（秒）
+        self._done = False
+        self._result_ready.connect(self._deliver)
+
+    def start(self):
+        self._done = False
+        threading.Thread(target=self._run, daemon=True).start()
+        if self.timeout is not None:
+            QTimer.singleShot(int(self.timeout * 1000), self._on_timeout)
+
+    def _run(self):
+        try:
+            result, error = self.func(*self.args), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            self._result_ready.emit(result, error)
+        except RuntimeError:
+            pass  # 窗口已销毁
+
+    def _deliver(self, result, error):
+        if not self._done:
+            self._done = True
+            self.task_finished.emit(result, error)
+
+    def _on_timeout(self):
+        if not self._done:
+            self._done = True
+            self.task_finished.emit(None, TimeoutError(f'{self.timeout} 秒内未完成'))